@@ -0,0 +1,129 @@
+"""
+Benchmark of a buffered event mode for Slice against Slice itself, on generated loop programs.
+The buffered variant (defined here, it is not part of the package) only appends one packed int per hook call
+and applies the events to Slice's datastore in bulk, each distinct event decoded once into a bound Slice hook.
+
+    python benchmarks/buffered_events.py 1000 10000 40000
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from array import array
+from functools import partial
+from typing import List, Callable, Any, Optional, Tuple, Dict, Iterable
+
+from dynamicslicing.runner import run_program
+from dynamicslicing.slice import Slice
+from dynamicslicing.utils import (WRITE, READ, POST_CALL, ENTER_IF, ENTER_FOR, ENTER_WHILE, CONTINUE, BREAK, FLAG, HOOKS,
+                                  FileIds, decode)
+
+BUFFER_EVENTS = 1 << 16  # events buffered before they are applied to the datastore
+
+
+class SliceBuffered(Slice):
+    """
+    Slice whose hooks only append one int per event, the datastore is built from the events
+    when the buffer is full (checked on writes and branches) and at end_execution
+    """
+
+    def __init__(self, source_path):
+        super().__init__(source_path)
+        self.events = array("Q")
+        self.file_ids = FileIds()
+        self.handlers = dict()  # to store event -> its hook of Slice with the arguments bound, decoded once
+
+    def _event(self, dyn_ast: str, iid: int, kind: int, flag: bool = False) -> None:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | (FLAG if flag else 0) | kind)
+        if kind in (WRITE, ENTER_IF, ENTER_FOR, ENTER_WHILE) and len(self.events) >= BUFFER_EVENTS:
+            self.flush()
+
+    def flush(self) -> None:
+        events = self.events.tolist()
+        handlers = self.handlers
+        for event in set(events).difference(handlers):  # decode the events not seen before, once
+            kind, dyn_ast, iid, flag = decode(event, self.file_ids.files)
+            name, arguments = HOOKS[kind]
+            handlers[event] = partial(getattr(Slice, name), self, *arguments(dyn_ast, iid, flag))
+        for handler in map(handlers.__getitem__, events):
+            handler()
+        del self.events[:]
+
+    def write(self, dyn_ast: str, iid: int, old_vals: List[Callable], new_val: Any) -> Any:
+        self._event(dyn_ast, iid, WRITE)
+
+    def read(self, dyn_ast: str, iid: int, val: Any) -> Any:
+        self._event(dyn_ast, iid, READ)
+
+    def post_call(self, dyn_ast: str, iid: int, result: Any, call: Callable, pos_args: Tuple, kw_args: Dict, ) -> Any:
+        self._event(dyn_ast, iid, POST_CALL)
+
+    def enter_if(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        self._event(dyn_ast, iid, ENTER_IF, cond_value)
+
+    def enter_for(self, dyn_ast: str, iid: int, next_value: Any, iterable: Iterable) -> Optional[Any]:
+        self._event(dyn_ast, iid, ENTER_FOR)
+
+    def enter_while(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        self._event(dyn_ast, iid, ENTER_WHILE, cond_value)
+
+    def _continue(self, dyn_ast: str, iid: int) -> Optional[bool]:
+        self._event(dyn_ast, iid, CONTINUE)
+
+    def _break(self, dyn_ast: str, iid: int) -> Optional[bool]:
+        self._event(dyn_ast, iid, BREAK)
+
+    def end_execution(self) -> None:
+        self.flush()
+        super().end_execution()
+
+
+def generate(iterations: int) -> str:
+    """
+    Program whose slice_me() runs a loop of iterations iterations, with writes, reads and branches in its body
+    """
+    return "\n".join([
+        "def slice_me():",
+        "    total = 0",
+        "    odd = 0",
+        "    i = 0",
+        f"    while i < {iterations}:",
+        "        if i % 2 == 1:",
+        "            odd += 1",
+        "        else:",
+        "            total += i",
+        "        i += 1",
+        "    result = total + odd # slicing criterion",
+        "    return result",
+        "",
+        "slice_me()",
+        "",
+    ])
+
+
+def run(iterations: int, analysis_class, repeat: int = 5) -> Tuple[float, str]:
+    """
+    Best time of repeat runs of the generated program with analysis_class, and the slice it wrote
+    """
+    best = float("inf")
+    with tempfile.TemporaryDirectory() as directory:
+        program = os.path.join(directory, "program.py")
+        for _ in range(repeat):
+            with open(program, "w") as file:
+                file.write(generate(iterations))
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # the analyses print the original and the sliced code
+                run_program(program, analysis_class)
+            best = min(best, time.perf_counter() - start)
+        with open(os.path.join(directory, "sliced.py"), "r") as file:
+            return best, file.read()
+
+
+if __name__ == "__main__":
+    for iterations in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 40000]:
+        direct, sliced = run(iterations, Slice)
+        buffered, buffered_sliced = run(iterations, SliceBuffered)
+        assert buffered_sliced == sliced
+        print(f"{iterations:>7} iterations: Slice {direct:.3f}s, buffered {buffered:.3f}s")
@@ -0,0 +1,46 @@
+"""
+Memory of the Slice datastore per entry on generated programs, with the entries as utils.Record
+and as the dicts they replaced ({"read": set, "write": str, "is_cond": bool, "body": list of lines}).
+Only the containers are counted, the variable names and line numbers are shared by both layouts.
+
+    python benchmarks/datastore_memory.py 1000 5000 20000
+"""
+import sys
+
+from dynamicslicing import utils
+from end_execution import generate
+
+
+def as_dict(record: utils.Record) -> dict:
+    """
+    The entry the hooks stored before utils.Record, a new read set and a list of the body lines per entry
+    """
+    entry = {"read": set(record.read), "write": record.write}
+    if record.is_cond:
+        entry["is_cond"] = True
+        entry["body"] = list(record.body)
+    return entry
+
+
+def footprint(datastore: dict) -> int:
+    """
+    Bytes of the entries of datastore, every container counted once
+    """
+    seen = set()  # to store the ids of the containers already counted, eg. the body of a loop
+    size = 0
+    for entry in datastore.values():
+        parts = entry.values() if isinstance(entry, dict) else (entry.read, entry.body)
+        for value in (entry, *parts):
+            if isinstance(value, (dict, set, list, tuple, range, utils.Record)) and id(value) not in seen:
+                seen.add(id(value))
+                size += sys.getsizeof(value)
+    return size
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 20000]:
+        datastore = generate(size)[1]
+        before = footprint({line: as_dict(record) for line, record in datastore.items()})
+        after = footprint(datastore)
+        print(f"{size:>7} statements, {len(datastore)} entries: dict {before / len(datastore):.0f} B/entry, "
+              f"Record {after / len(datastore):.0f} B/entry ({before / after:.1f}x smaller)")
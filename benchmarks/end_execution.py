@@ -0,0 +1,76 @@
+"""
+Benchmark of the backward pass of Slice.end_execution on generated straight-line / if-heavy programs.
+The datastore is filled the way the hooks would fill it, so only the slicing pass (and remove_lines) is timed.
+
+    python benchmarks/end_execution.py 1000 5000 10000 20000
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from dynamicslicing import utils
+from dynamicslicing.slice import Slice
+
+
+def generate(size: int):
+    """
+    Program with size statements in slice_me(), every 10th statement is an if with a 3 line body,
+    its datastore and the symbol table of its variables
+    """
+    symbols = utils.Symbols()
+    v = lambda i: symbols.intern(f"v{i}")
+    lines = ["def slice_me():", "    v0 = 0"]
+    datastore = {2: utils.Record(write=v(0))}
+    i = 1
+    while len(lines) - 1 < size:
+        line = len(lines) + 1
+        if i % 10 == 0:
+            lines.append(f"    if v{i - 1} > 0:")
+            datastore[line] = utils.Record((v(i - 1),), is_cond=True, body=range(line + 1, line + 4))
+            for k in range(3):
+                lines.append(f"        v{i} = v{i - 1} + {k}")
+                datastore[line + 1 + k] = utils.Record((v(i - 1),), v(i))
+                i += 1
+        else:
+            lines.append(f"    v{i} = v{i - 1} + 1")
+            datastore[line] = utils.Record((v(i - 1),), v(i))
+            i += 1
+    lines.append(f"    return v{i - 1} # slicing criterion")
+    lines.append("")
+    lines.append("slice_me()")
+    return "\n".join(lines) + "\n", datastore, len(lines) - 2, f"v{i - 1}", symbols
+
+
+def run(size: int, unparse: bool = True):
+    source, datastore, slicing_line, target, symbols = generate(size)
+    remove_lines = utils.remove_lines
+    if not unparse:  # time only the backward pass
+        utils.remove_lines = lambda code, lines_to_keep: code
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            program = os.path.join(directory, "program.py")
+            with open(program + ".orig", "w") as file:
+                file.write(source)
+            analysis = Slice(program)
+            analysis.lines_to_keep = {1, slicing_line, slicing_line + 2}
+            analysis.symbols = symbols
+            analysis.target_variables = {symbols.intern(target)}
+            analysis.slicing_line = slicing_line
+            for line, val in datastore.items():
+                analysis._store(line, val)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # remove_lines prints the original and the sliced code
+                analysis.end_execution()
+            return time.perf_counter() - start, len(analysis.lines_to_keep)
+    finally:
+        utils.remove_lines = remove_lines
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 10000, 20000]:
+        total, kept = run(size)
+        backward, _ = run(size, unparse=False)
+        print(f"{size:>7} statements: end_execution {total:.3f}s, backward pass {backward:.3f}s, {kept} lines kept")
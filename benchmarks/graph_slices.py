@@ -0,0 +1,92 @@
+"""
+Benchmark of the backward slices of SliceGraph.end_execution over a generated dynamic dependence graph:
+statements in a loop, each defining one variable from the previous one and a random earlier one, with many
+slicing criteria.
+Compares DynamicDependenceGraph.slices (all criteria at once, one bitset per node) with one
+memoized reachable() traversal per criterion, the way SliceGraph sliced before.
+
+    python benchmarks/graph_slices.py 10000 50000 --criteria 50
+"""
+import argparse
+import random
+import time
+from typing import Dict, Iterable, Set
+
+from dynamicslicing.dependence_graph import DynamicDependenceGraph
+
+
+def generate(statements: int, iterations: int, criteria: int):
+    """
+    Graph of a loop (line 1) running iterations times over statements lines, and the seeds of the criteria
+    """
+    rand = random.Random(0)
+    graph = DynamicDependenceGraph()
+    uses = [(line - 1, rand.randrange(2, line)) if line > 2 else () for line in range(statements + 2)]
+    for _ in range(iterations):
+        graph.add_instance(1)
+        for line in range(2, statements + 2):
+            node = graph.add_instance(line, (1,))
+            for other in uses[line]:
+                graph.use(node, f"v{other}")
+            graph.define(node, f"v{line}")
+    seeds = {f"c{k}": {graph.last_def[f"v{rand.randrange(2, statements + 2)}"]} for k in range(criteria)}
+    return graph, seeds
+
+
+def reachable(graph: DynamicDependenceGraph, seeds: Iterable[int], loop_lines: Set[int],
+              memo: Dict[int, Set[int]]) -> Set[int]:
+    """
+    Backward traversal over data and control edges, each node is visited once.
+    Once a loop header is reached, all its iterations are kept so that the sliced loop still terminates.
+    memo holds the nodes reachable from nodes of earlier traversals, those are not traversed again.
+    """
+    visited = set()
+    expanded = set()  # loop headers whose iterations are all in the worklist
+    worklist = [seed for seed in seeds if seed is not None]
+    while worklist:
+        node = worklist.pop()
+        if node in visited:
+            continue
+        if node in memo:
+            visited.update(memo[node])
+            continue
+        visited.add(node)
+        line = graph.nodes[node]["line"]
+        if line in loop_lines and line not in expanded:
+            expanded.add(line)
+            worklist.extend(graph.instances[line])
+        worklist.extend(graph.nodes[node]["data"])
+        worklist.extend(graph.nodes[node]["control"])
+    return visited
+
+
+def per_criterion(graph: DynamicDependenceGraph, seeds, loop_lines):
+    memo = dict()
+    slices = dict()
+    for name, nodes in seeds.items():
+        reached = set()
+        for seed in nodes:
+            if seed not in memo:
+                memo[seed] = reachable(graph, [seed], loop_lines, memo)
+            reached.update(memo[seed])
+        slices[name] = graph.lines(reached)
+    return slices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[10000, 50000])
+    parser.add_argument("--iterations", type=int, default=2)
+    parser.add_argument("--criteria", type=int, default=50)
+    args = parser.parse_args()
+    for size in args.sizes:
+        graph, seeds = generate(size, args.iterations, args.criteria)
+        for loop_lines in (set(), {1}):
+            start = time.perf_counter()
+            expected = per_criterion(graph, seeds, loop_lines)
+            middle = time.perf_counter()
+            assert graph.slices(seeds, loop_lines) == expected
+            end = time.perf_counter()
+            print(f"{size:>7} statements x {args.iterations} iterations, {args.criteria} criteria"
+                  f"{', loop kept whole' if loop_lines else ''}: reachable() per criterion {middle - start:.3f}s,"
+                  f" slices() {end - middle:.3f}s")
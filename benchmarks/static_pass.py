@@ -0,0 +1,48 @@
+"""
+Benchmark of the static passes of one run on generated programs: slicing criteria (get_slice_line),
+control dependences, the iid -> node table and remove_lines, which all share one parse of the program.
+
+    python benchmarks/static_pass.py 500 2000 5000
+"""
+import contextlib
+import io
+import sys
+import time
+
+import libcst as cst
+from dynapyt.instrument.IIDs import Location
+from libcst.metadata import PositionProvider
+
+from dynamicslicing import utils
+from end_execution import generate
+
+
+def iid_to_location(source: str):
+    """
+    An iid for every node kind the analyses hook into, like dynapyt's instrumentation would assign
+    """
+    positions = cst.metadata.MetadataWrapper(cst.parse_module(source)).resolve(PositionProvider)
+    iids = dict()
+    for node, position in positions.items():
+        if isinstance(node, (cst.Assign, cst.AugAssign, cst.Name, cst.Call, cst.If, cst.For, cst.While)):
+            iids[len(iids)] = Location("program.py", position.start.line, position.start.column,
+                                       position.end.line, position.end.column)
+    return iids
+
+
+def run(size: int):
+    source = generate(size)[0]
+    iids = iid_to_location(source)
+    utils.source_model.cache_clear()
+    start = time.perf_counter()
+    return_vals = utils.get_slice_line(source)
+    utils.get_control_dependences(utils.source_model(source))
+    utils.build_node_table(utils.source_model(source), iids)
+    with contextlib.redirect_stdout(io.StringIO()):  # remove_lines prints the original and the sliced code
+        utils.remove_lines(source, return_vals[0])
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [500, 2000, 5000]:
+        print(f"{size:>7} statements: static passes {min(run(size) for _ in range(3)):.3f}s")
@@ -0,0 +1,182 @@
+"""
+Benchmark suite of the slicing analyses, on every milestone program and on programs of workload.py
+of growing size and trace length. For each program and analysis it measures the program uninstrumented, instrumented
+with the hooks of the analysis but no analysis, and sliced, with the events per second, the cost of each hook,
+the peak memory and the time of end_execution. The results are saved as JSON, --compare prints the change
+against the results of another commit.
+
+    python benchmarks/suite.py --json results.json
+    python benchmarks/suite.py --statements 50 500 --iterations 10 1000 --analyses slice dataflow --compare results.json
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from importlib.metadata import version
+from typing import Dict, List, Tuple
+
+from dynapyt.utils.hooks import get_hooks_from_analysis
+
+from dynamicslicing.cache import instrument_source
+from dynamicslicing.instrument import instrumented_lines
+from dynamicslicing.profiling import Profile
+from dynamicslicing.runner import runtime
+from dynamicslicing.slice import Slice
+from dynamicslicing.slice_dataflow import SliceDataflow
+from dynamicslicing.slice_graph import SliceGraph
+from workload import generate
+
+ANALYSES = {"dataflow": SliceDataflow, "slice": Slice, "graph": SliceGraph}
+MILESTONES = {"dataflow": "milestone2", "slice": "milestone3", "graph": "milestone4"}  # programs each analysis handles
+TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests")
+
+
+def programs(analysis: str, statements: List[int], depth: int, iterations: List[int]) -> List[Tuple[str, str, str]]:
+    """
+    (name, path, source) of the milestone programs of analysis and of the generated programs,
+    for every number of statements and of iterations of their loops
+    """
+    found = []
+    for path in sorted(glob.glob(os.path.join(TESTS, MILESTONES[analysis], "test_*", "program.py")),
+                       key=lambda path: int(path.split(os.sep)[-2][len("test_"):])):
+        with open(path, "r") as file:
+            found.append((os.path.relpath(os.path.dirname(path), TESTS), os.path.abspath(path), file.read()))
+    for size in statements:
+        for count in iterations:
+            name = f"workload_{size}x{count}^{depth}"
+            found.append((name, os.path.abspath(name + ".py"), generate(size, depth, count)))
+    return found
+
+
+def new_analysis(analysis_class, path: str, source: str, locations: Dict):
+    analysis = analysis_class(path)
+    analysis.source = source
+    analysis.locations = locations
+    analysis.write_files = False
+    return analysis
+
+
+def execute(code: str, path: str, analyses: List, instrumented: bool = True) -> float:
+    """
+    Seconds to run code (with the dynapyt runtime of analyses, including their end_execution), output discarded
+    """
+    module = {"__name__": "dynamicslicing_program", "__file__": path}
+    compiled = compile(code, path, "exec")
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        if instrumented:
+            with runtime(analyses):
+                exec(compiled, module)
+        else:
+            exec(compiled, module)
+        return time.perf_counter() - start
+
+
+def timed_end_execution(analysis, timing: List[float]) -> None:
+    """
+    Replace end_execution of analysis by a wrapper appending its time to timing
+    """
+    end_execution = analysis.end_execution
+
+    def timed():
+        start = time.perf_counter()
+        end_execution()
+        timing.append(time.perf_counter() - start)
+
+    analysis.end_execution = timed
+
+
+def measure(analysis_name: str, name: str, path: str, source: str, repeat: int) -> Dict:
+    analysis_class = ANALYSES[analysis_name]
+    probe = analysis_class(path)
+    code, locations = instrument_source(path, source, get_hooks_from_analysis([probe]),
+                                        instrumented_lines([probe], path, source))
+    result = {"program": name, "analysis": analysis_name, "lines": source.count("\n")}
+    result["uninstrumented_s"] = min(execute(source, path, [], instrumented=False) for _ in range(repeat))
+    result["instrumented_s"] = min(execute(code, path, []) for _ in range(repeat))
+
+    sliced, end_execution = [], []
+    for _ in range(repeat):
+        analysis = new_analysis(analysis_class, path, source, locations)
+        timing = []
+        timed_end_execution(analysis, timing)
+        sliced.append(execute(code, path, [analysis]))
+        end_execution.append(timing[0])
+    result["sliced_s"] = min(sliced)
+    result["end_execution_s"] = min(end_execution)
+
+    # separate runs, the wrappers and tracemalloc slow the hooks down
+    analysis = new_analysis(analysis_class, path, source, locations)
+    profile = Profile(analysis)
+    execute(code, path, [analysis])
+    report = profile.report()
+    result["events"] = report["events"]
+    result["events_per_s"] = result["events"] / max(result["sliced_s"] - result["end_execution_s"], 1e-9)
+    result["hooks"] = {hook: cost for hook, cost in report["hooks"].items() if cost["calls"]}
+    result["helpers"] = {helper: cost for helper, cost in report["helpers"].items() if cost["calls"]}
+
+    analysis = new_analysis(analysis_class, path, source, locations)
+    tracemalloc.start()
+    execute(code, path, [analysis])
+    result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "machine": platform.machine(),
+            "dynapyt": version("dynapyt"), "libcst": version("libcst")}
+
+
+def compare(results: List[Dict], baseline_file: str) -> None:
+    """
+    Print the ratio of the sliced / end_execution times and peak memory to the same rows of another run
+    """
+    with open(baseline_file, "r") as file:
+        baseline = {(row["program"], row["analysis"]): row for row in json.load(file)["results"]}
+    for row in results:
+        old = baseline.get((row["program"], row["analysis"]))
+        if old is not None:
+            changes = ", ".join(f"{key} x{row[key] / old[key]:.2f}" for key in
+                                ("sliced_s", "end_execution_s", "peak_memory_bytes") if old[key])
+            print(f"{row['analysis']:>8} {row['program']:<24} {changes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", nargs="*", choices=sorted(ANALYSES), default=["dataflow", "slice", "graph"])
+    parser.add_argument("--statements", nargs="*", type=int, default=[50, 200],
+                        help="statements of the generated programs")
+    parser.add_argument("--depth", type=int, default=1, help="nesting depth of the loops of the generated programs")
+    parser.add_argument("--iterations", nargs="*", type=int, default=[10, 100, 1000],
+                        help="iterations of every loop of the generated programs")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of repeat runs is reported")
+    parser.add_argument("--json", help="file to save the results to")
+    parser.add_argument("--compare", help="results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = []
+    for analysis_name in args.analyses:
+        for name, path, source in programs(analysis_name, args.statements, args.depth, args.iterations):
+            row = measure(analysis_name, name, path, source, args.repeat)
+            results.append(row)
+            print(f"{analysis_name:>8} {name:<24} {row['events']:>8} events  uninstrumented {row['uninstrumented_s']:.4f}s"
+                  f"  instrumented {row['instrumented_s']:.4f}s  sliced {row['sliced_s']:.4f}s"
+                  f"  end_execution {row['end_execution_s']:.4f}s  {row['events_per_s']:,.0f} events/s"
+                  f"  peak {row['peak_memory_bytes'] / 1e6:.1f}MB", flush=True)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=1)
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,105 @@
+"""
+Generator of slice_me() programs of any size for the benchmarks: statements spread over nested loops,
+writes, augmented assignments and literal overwrites of variables, attribute writes and reads of objects
+and of their aliases, list subscript writes and ifs, and a slicing criterion on the return. The same arguments and seed always
+give the same program.
+
+    python benchmarks/workload.py --statements 200 --depth 2 --iterations 10 --objects 3 --aliases 2 > program.py
+"""
+import argparse
+import random
+from typing import List
+
+ITEMS = 8  # length of the list written by subscript
+
+
+def generate(statements: int = 50, depth: int = 1, iterations: int = 10, variables: int = 8, objects: int = 2,
+             attributes: int = 2, aliases: int = 1, subscripts: bool = True, seed: int = 0) -> str:
+    """
+    Program of about statements statements in slice_me(), the same number at every nesting level of depth loops
+    of iterations iterations each (the innermost body runs iterations ** depth times)
+    """
+    if variables < 1:
+        raise ValueError(f"a workload needs at least one variable, got variables={variables}")
+    counts = dict(statements=statements, depth=depth, iterations=iterations, objects=objects, attributes=attributes,
+                  aliases=aliases)
+    for name, count in counts.items():
+        if count < 0:
+            raise ValueError(f"{name} of a workload cannot be negative, got {name}={count}")
+    rand = random.Random(seed)
+    lines = ["class Node:", "    def __init__(self):"]
+    lines += [f"        self.a{k} = {k}" for k in range(attributes)] or ["        pass"]
+    lines += ["", "", "def slice_me():"]
+    lines += [f"    v{k} = {k + 1}" for k in range(variables)]
+    lines += [f"    o{k} = Node()" for k in range(objects)]
+    lines += [f"    r{k} = o{rand.randrange(objects)}" for k in range(aliases if objects else 0)]  # aliases
+    if subscripts:
+        lines.append(f"    items = [0] * {ITEMS}")
+
+    counters = []  # to store the loop variables in scope
+    for level in range(depth + 1):
+        indent = "    " * (level + 1)
+        for _ in range(max(statements // (depth + 1), 1 if level else 0)):  # a loop body is never empty
+            lines += [indent + line for line in statement(rand, variables, objects, attributes, aliases, subscripts,
+                                                          counters)]
+        if level < depth:
+            counters.append(f"i{level}")
+            lines.append(f"{indent}for i{level} in range({iterations}):")
+
+    parts = ["v0"] + (["o0.a0"] if objects and attributes else []) + (["items[0]"] if subscripts else [])
+    lines.append(f"    result = {' + '.join(parts)}")
+    lines.append("    return result  # slicing criterion")
+    lines += ["", "", "slice_me()"]
+    return "\n".join(lines) + "\n"
+
+
+def statement(rand: random.Random, variables: int, objects: int, attributes: int, aliases: int, subscripts: bool,
+              counters: List[str]) -> List[str]:
+    """
+    Lines of one random statement, relative to the indentation of its block
+    """
+    def value() -> str:
+        return f"v{rand.randrange(variables)}" if not counters or rand.random() < 0.7 else rand.choice(counters)
+
+    def target() -> str:  # an object or one of its aliases
+        if aliases and rand.random() < 0.5:
+            return f"r{rand.randrange(aliases)}"
+        return f"o{rand.randrange(objects)}"
+
+    kinds = ["assign", "augment", "overwrite", "if"]
+    if objects and attributes:
+        kinds += ["attribute_write", "attribute_read"]
+    if subscripts:
+        kinds.append("subscript")
+    kind = rand.choice(kinds)
+    variable = f"v{rand.randrange(variables)}"
+    if kind == "assign":
+        return [f"{variable} = ({value()} + {value()}) % 97"]
+    if kind == "overwrite":  # kills the earlier definitions of the variable
+        return [f"{variable} = {rand.randrange(97)}"]
+    if kind == "augment":
+        return [f"{variable} += {value()} % 3"]
+    if kind == "if":
+        return [f"if {value()} > {value()}:", f"    {variable} = {value()} + 1"]
+    attribute = f"a{rand.randrange(attributes)}" if attributes else ""
+    if kind == "attribute_write":
+        return [f"{target()}.{attribute} = {value()}"]
+    if kind == "attribute_read":
+        return [f"{variable} = {target()}.{attribute} % 97"]
+    return [f"items[{value()} % {ITEMS}] = {value()}"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--statements", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=1, help="nesting depth of the loops")
+    parser.add_argument("--iterations", type=int, default=10, help="iterations of every loop")
+    parser.add_argument("--variables", type=int, default=8)
+    parser.add_argument("--objects", type=int, default=2)
+    parser.add_argument("--attributes", type=int, default=2, help="attributes of every object")
+    parser.add_argument("--aliases", type=int, default=1, help="variables aliasing one of the objects")
+    parser.add_argument("--no-subscripts", dest="subscripts", action="store_false", help="no list subscript writes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.statements, args.depth, args.iterations, args.variables, args.objects, args.attributes,
+                   args.aliases, args.subscripts, args.seed), end="")
@@ -0,0 +1,143 @@
+import multiprocessing
+from abc import ABC, abstractmethod
+from array import array
+from functools import partial
+from typing import List, Callable, Any, Optional, Tuple, Dict, Iterable, Set, Type
+
+from dynapyt.analyses.BaseAnalysis import BaseAnalysis
+
+from dynamicslicing.slice_graph import SliceGraph
+from dynamicslicing.utils import (WRITE, READ, POST_CALL, ENTER_IF, ENTER_FOR, ENTER_WHILE, CONTINUE, BREAK, FLAG, HOOKS,
+                                  FileIds, decode)
+
+BUFFER_EVENTS = 1 << 16  # events buffered before they are sent to the worker
+FILE, EVENTS = b"F", b"E"  # first byte of a message: a newly seen instrumented file, or a batch of packed events
+
+
+class EventBuffer(ABC):
+    """
+    Hooks that only append one packed int per event to self.events, flush() empties the buffer
+    once it holds buffer_events events. Reads and calls do not check the size, the next write or branch does.
+    """
+
+    def __init__(self, buffer_events: int = BUFFER_EVENTS):
+        self.buffer_events = buffer_events
+        self.events = array("Q")
+        self.file_ids = FileIds()
+
+    @abstractmethod
+    def flush(self) -> None:
+        """
+        Consume the buffered events and empty the buffer
+        """
+
+    def write(self, dyn_ast: str, iid: int, old_vals: List[Callable], new_val: Any) -> Any:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | WRITE)
+        if len(self.events) >= self.buffer_events:
+            self.flush()
+
+    def read(self, dyn_ast: str, iid: int, val: Any) -> Any:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | READ)
+
+    def post_call(self, dyn_ast: str, iid: int, result: Any, call: Callable, pos_args: Tuple, kw_args: Dict, ) -> Any:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | POST_CALL)
+
+    def enter_if(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | (FLAG if cond_value else 0) | ENTER_IF)
+        if len(self.events) >= self.buffer_events:
+            self.flush()
+
+    def enter_for(self, dyn_ast: str, iid: int, next_value: Any, iterable: Iterable) -> Optional[Any]:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | ENTER_FOR)
+        if len(self.events) >= self.buffer_events:
+            self.flush()
+
+    def enter_while(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | (FLAG if cond_value else 0) | ENTER_WHILE)
+        if len(self.events) >= self.buffer_events:
+            self.flush()
+
+    def _continue(self, dyn_ast: str, iid: int) -> Optional[bool]:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | CONTINUE)
+
+    def _break(self, dyn_ast: str, iid: int) -> Optional[bool]:
+        self.events.append(self.file_ids[dyn_ast] | iid << 5 | BREAK)
+
+
+def consume(connection, source_path: str, analysis_class: Type[BaseAnalysis]) -> None:
+    """
+    Worker process: replay the batches of events received on connection into analysis_class,
+    in order, and write its slice once the end of the execution (an empty message) is received
+    """
+    analysis = analysis_class(source_path)
+    analysis.begin_execution()
+    hooks = {kind: (getattr(analysis, name), arguments) for kind, (name, arguments) in HOOKS.items()
+             if hasattr(analysis, name)}  # only the hooks the analysis implements
+    files = []
+    handlers = dict()  # to store event -> its hook with the arguments bound, decoded once
+    while True:
+        message = connection.recv_bytes()
+        if not message:
+            break
+        if message[:1] == FILE:
+            files.append(message[1:].decode())
+            continue
+        events = array("Q")
+        events.frombytes(memoryview(message)[1:])
+        events = events.tolist()
+        for event in set(events).difference(handlers):
+            kind, dyn_ast, iid, flag = decode(event, files)
+            if kind in hooks:
+                hook, arguments = hooks[kind]
+                handlers[event] = partial(hook, *arguments(dyn_ast, iid, flag))
+            else:
+                handlers[event] = lambda: None
+        for handler in map(handlers.__getitem__, events):
+            handler()
+    analysis.end_execution()
+
+
+class SliceBackground(EventBuffer, BaseAnalysis):
+    """
+    Background mode: the hooks only pack events, which are sent in batches through a pipe to a worker process
+    that runs analysis_class (SliceGraph) concurrently with the program; end_execution waits for it to write sliced.py
+    """
+
+    def __init__(self, source_path, analysis_class: Type[BaseAnalysis] = SliceGraph, buffer_events: int = BUFFER_EVENTS):
+        BaseAnalysis.__init__(self)
+        EventBuffer.__init__(self, buffer_events)
+        self.source_path = source_path
+        self.analysis_class = analysis_class
+        self.connection = None
+        self.worker = None
+        self.files_sent = 0  # number of files of self.file_ids the worker knows
+
+    def instrumented_lines(self, source: str) -> Set[int]:
+        return self.analysis_class(self.source_path).instrumented_lines(source)
+
+    def begin_execution(self) -> None:
+        receiver, self.connection = multiprocessing.Pipe(duplex=False)
+        self.worker = multiprocessing.Process(target=consume, args=(receiver, self.source_path, self.analysis_class),
+                                              daemon=True)
+        self.worker.start()
+        receiver.close()
+
+    def flush(self) -> None:
+        """
+        Send the buffered events to the worker, blocks while the worker is still busy with the previous batch
+        """
+        files = self.file_ids.files
+        while self.files_sent < len(files):  # files first seen in this batch
+            self.connection.send_bytes(FILE + files[self.files_sent].encode())
+            self.files_sent += 1
+        if self.events:
+            self.connection.send_bytes(EVENTS + self.events.tobytes())
+            del self.events[:]
+
+    def end_execution(self) -> None:
+        self.flush()
+        self.connection.send_bytes(b"")
+        self.connection.close()
+        self.worker.join()
+        if self.worker.exitcode != 0:
+            raise RuntimeError(f"slicing worker of {self.source_path} exited with code {self.worker.exitcode}")
@@ -0,0 +1,194 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+import tempfile
+import tokenize
+from functools import lru_cache
+from importlib.metadata import version
+from shutil import copyfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dynapyt.instrument.IIDs import IIDs, Location
+from dynapyt.instrument.instrument import instrument_file as dynapyt_instrument_file
+
+from dynamicslicing import instrument, utils
+
+# content-addressed store of instrumented programs and static pre-pass results, off unless a directory is given
+CACHE_DIR = os.environ.get("DYNAMICSLICING_CACHE", "")
+# also keep the runs of Slice there to reslice them (store_run), opt-in: every program and run adds its events
+RUNS = bool(CACHE_DIR) and bool(os.environ.get("DYNAMICSLICING_RUNS"))
+
+
+@lru_cache(maxsize=None)
+def _version() -> str:
+    """
+    Everything the cached results depend on besides the program: dynapyt, libcst, python and every module of this package
+    """
+    package = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(package)):
+        if name.endswith(".py"):
+            with open(os.path.join(package, name), "rb") as file:
+                digest.update(name.encode() + b"\0" + file.read())
+    return f"{version('dynapyt')}|{version('libcst')}|{sys.version_info[:2]}|{digest.hexdigest()}"
+
+
+def _digest(*parts: str) -> str:
+    digest = hashlib.sha256(_version().encode())
+    for part in parts:
+        digest.update(b"\0" + part.encode())
+    return digest.hexdigest()
+
+
+def _header(key: str) -> bytes:
+    """
+    First line of an entry: what it was stored for, checked before anything of the entry is unpickled
+    """
+    return f"dynamicslicing|{_version()}|{key}\n".encode()
+
+
+def _load(kind: str, key: str) -> Any:
+    try:
+        with open(os.path.join(CACHE_DIR, kind, key + ".pickle"), "rb") as file:
+            if file.readline() != _header(key):  # not an entry of this version for this key, never unpickled
+                return None
+            return pickle.load(file)
+    except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+        return None
+
+
+def _store(kind: str, key: str, value: Any) -> None:
+    directory = os.path.join(CACHE_DIR, kind)
+    os.makedirs(directory, exist_ok=True)
+    # written aside and renamed, so that parallel runs never read a partial entry
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(handle, "wb") as file:
+        file.write(_header(key))
+        pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, os.path.join(directory, key + ".pickle"))
+
+
+def _cached(kind: str, key: str, compute: Callable[[], Any]) -> Any:
+    if not CACHE_DIR:
+        return compute()
+    value = _load(kind, key)
+    if value is None:
+        value = compute()
+        _store(kind, key, value)
+    return value
+
+
+def _iids_path(program_file: str) -> str:
+    """
+    Path of the iid map of a program (or of its .py.orig), as in dynapyt's IIDs
+    """
+    if program_file.endswith(".py.orig"):
+        return program_file[:-len(".py.orig")] + "-dynapyt.json"
+    return os.path.splitext(program_file)[0] + "-dynapyt.json"
+
+
+def _read(path: str) -> str:
+    if not os.path.exists(path):
+        return ""
+    with open(path, "r") as file:
+        return file.read()
+
+
+def _instrument(program_file: str, selected_hooks: Any, lines: Optional[Iterable[int]]) -> None:
+    if lines is None:
+        dynapyt_instrument_file(program_file, selected_hooks)
+    else:
+        instrument.instrument_file(program_file, selected_hooks, lines)
+
+
+def instrument_file(program_file: str, selected_hooks: Any, lines: Optional[Iterable[int]] = None) -> None:
+    """
+    Same as dynapyt's instrument_file (program.py.orig, instrumented program.py and program-dynapyt.json),
+    but an unchanged program instrumented for the same hooks is copied from the cache instead.
+    When lines is given only the statements touching them are instrumented, see instrument.instrumented_lines
+    """
+    source = _read(program_file)
+    if not CACHE_DIR or "DYNAPYT: DO NOT INSTRUMENT" in source:
+        _instrument(program_file, selected_hooks, lines)
+        return
+    iids_path = _iids_path(program_file)
+    # the instrumented code has the path of the program, the iids continue from an existing iid map
+    key = _digest(os.path.abspath(program_file), json.dumps(selected_hooks, sort_keys=True, default=str),
+                  json.dumps(sorted(lines) if lines is not None else None), source, _read(iids_path))
+    entry = _load("instrumented", key)
+    if entry is None:
+        _instrument(program_file, selected_hooks, lines)
+        if "DYNAPYT: DO NOT INSTRUMENT" in _read(program_file):  # not stored if dynapyt failed
+            _store("instrumented", key, {"code": _read(program_file), "iids": _read(iids_path)})
+        return
+    copyfile(program_file, os.path.splitext(program_file)[0] + ".py.orig")
+    with open(program_file, "w") as file:
+        file.write(entry["code"])
+    with open(iids_path, "w") as file:
+        file.write(entry["iids"])
+
+
+def instrument_source(program_file: str, source: str, selected_hooks: Any,
+                      lines: Optional[Iterable[int]] = None) -> Tuple[str, Dict[int, Location]]:
+    """
+    instrument.instrument_source, cached: the instrumented code of source and its iid map, nothing written next to program_file
+    """
+    key = _digest(os.path.abspath(program_file), json.dumps(selected_hooks, sort_keys=True, default=str),
+                  json.dumps(sorted(lines) if lines is not None else None), source)
+    return _cached("memory", key, lambda: instrument.instrument_source(source, program_file, selected_hooks, lines))
+
+
+def static_analysis(source: str) -> Tuple[List, utils.ControlDependence]:
+    """
+    Slicing criteria, class and slice_me() lines (utils.get_slice_line) and control dependences of a program
+    """
+    return _cached("static", _digest(source),
+                   lambda: (utils.get_slice_line(source), utils.get_control_dependences(utils.source_model(source))))
+
+
+def node_table(dyn_ast: str, source: Optional[str] = None,
+               locations: Optional[Dict[int, Location]] = None) -> Dict[int, utils.NodeEntry]:
+    """
+    utils.build_node_table of an instrumented file, keyed by the program and its iid map.
+    source and locations are those of a program instrumented in memory (instrument_source), read from disk when None
+    """
+    if locations is not None:
+        return _cached("nodes", _digest(source, repr(sorted(locations.items()))),
+                       lambda: utils.build_node_table(utils.source_model(source), locations))
+    source = _read(dyn_ast)
+    iids = _read(_iids_path(dyn_ast))
+    return _cached("nodes", _digest(source, iids),
+                   lambda: utils.build_node_table(utils.source_model(source), IIDs(dyn_ast).iid_to_location))
+
+
+def _code_digest(source: str) -> str:
+    """
+    Digest of the tokens of a program but its comments, with their positions: the same for every
+    slicing criterion, different for any change of the code or of its line numbers
+    """
+    try:
+        tokens = [(token.type, token.string, token.start[0] if token.type in (tokenize.NEWLINE, tokenize.NL) else token.start)
+                  for token in tokenize.generate_tokens(io.StringIO(source).readline) if token.type != tokenize.COMMENT]
+    except (tokenize.TokenError, SyntaxError):
+        return _digest(source)
+    return _digest(repr(tokens))
+
+
+def store_run(program_file: str, source: str, state: Dict) -> None:
+    """
+    Store what an analysis recorded while running program_file, for a later run of the same code (see load_run)
+    """
+    if RUNS:
+        _store("runs", _digest(os.path.abspath(program_file), _code_digest(source)), state)
+
+
+def load_run(program_file: str, source: str) -> Optional[Dict]:
+    """
+    State stored by store_run for a program whose code is source, up to its comments
+    """
+    if not RUNS:
+        return None
+    return _load("runs", _digest(os.path.abspath(program_file), _code_digest(source)))
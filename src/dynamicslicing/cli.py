@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import traceback
+from typing import List, Dict, Optional, Tuple
+
+# analysis classes by name, imported in the workers
+ANALYSES = {
+    "dataflow": "dynamicslicing.slice_dataflow.SliceDataflow",
+    "slice": "dynamicslicing.slice.Slice",
+    "graph": "dynamicslicing.slice_graph.SliceGraph",
+    "background": "dynamicslicing.background.SliceBackground",
+    "record": "dynamicslicing.trace.SliceRecord",
+}
+
+# a line ending with a (named) slicing criterion comment
+CRITERION = re.compile(r"# slicing criterion(?::\s*\w+)?[ \t]*$", re.MULTILINE)
+
+
+def find_programs(paths: List[str]) -> List[str]:
+    """
+    Programs to slice: the given files, and every .py file with a slicing criterion under the given directories
+    """
+    programs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(".py") and not name.startswith(("sliced", "expected")):
+                        with open(os.path.join(root, name), "r") as file:
+                            if CRITERION.search(file.read()):
+                                programs.append(os.path.join(root, name))
+        else:
+            programs.append(path)
+    return [os.path.abspath(program) for program in programs]
+
+
+def outputs(directory: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Slices and traces in directory, with their modification time and size
+    """
+    found = dict()
+    for name in os.listdir(directory):
+        if name.startswith("sliced") and name.endswith(".py") or name.endswith(".trace"):
+            stat = os.stat(os.path.join(directory, name))
+            found[os.path.join(directory, name)] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def slice_one(program: str, analysis: str) -> Dict:
+    """
+    Worker: instrument, run and slice one program, in a process of its own so the dynapyt runtime is not shared
+    """
+    from importlib import import_module
+    from dynamicslicing.runner import run_program
+
+    module_name, class_name = ANALYSES[analysis].rsplit(".", 1)
+    directory = os.path.dirname(program)
+    before = outputs(directory)
+    start = time.perf_counter()
+    result = {"program": program, "analysis": analysis}
+    try:
+        run_program(program, getattr(import_module(module_name), class_name))
+        result["status"] = "ok"
+    except Exception:
+        result["status"] = "error"
+        result["error"] = traceback.format_exc()
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    # only the files this run wrote, not those left by earlier runs or other programs of the directory
+    result["outputs"] = sorted(path for path, stamp in outputs(directory).items() if before.get(path) != stamp)
+    return result
+
+
+def _slice_task(task: Tuple[int, str, str]) -> Tuple[int, Dict]:
+    """
+    Worker: slice_one for a (index, program, analysis) task, with the index of the program to put the results in order
+    """
+    index, program, analysis = task
+    return index, slice_one(program, analysis)
+
+
+def slice_all(programs: List[str], analysis: str, workers: Optional[int] = None) -> List[Dict]:
+    """
+    slice_one for every program in a pool of spawned processes, each program in a new process (maxtasksperchild=1),
+    results in the order of programs
+    """
+    results = [None] * len(programs)
+    tasks = [(index, program, analysis) for index, program in enumerate(programs)]
+    with multiprocessing.get_context("spawn").Pool(workers, maxtasksperchild=1) as pool:
+        for index, result in pool.imap_unordered(_slice_task, tasks):
+            print(f"{result['status']:>5}  {result['seconds']:8.3f}s  {result['program']}", flush=True)
+            results[index] = result
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="dynamicslicing", description="Dynamic backward slicing of Python programs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="instrument, run and slice programs in parallel")
+    run.add_argument("paths", nargs="+", help="programs, or directories searched for programs with a slicing criterion")
+    run.add_argument("--analysis", choices=sorted(ANALYSES), default="slice")
+    run.add_argument("--workers", type=int, default=None, help="number of processes (default: number of cores)")
+    run.add_argument("--json", help="write the per-program results to this file")
+    run.add_argument("--reslice", action="store_true",
+                     help="store the runs of the slice analysis in DYNAMICSLICING_CACHE, to reslice them "
+                          "when only the slicing criterion moved")
+
+    offline = commands.add_parser("offline", help="slice a trace recorded with --analysis record")
+    offline.add_argument("source_path", help="path of the recorded program, eg. dir/program.py")
+    offline.add_argument("--engine", choices=["backward", "dataflow", "graph", "slice"], default="slice")
+
+    args = parser.parse_args(argv)
+    if args.command == "offline":
+        from dynamicslicing.offline import slice_trace
+        slice_trace(args.source_path, args.engine)
+        return 0
+
+    if args.reslice:  # read by dynamicslicing.cache in the workers
+        os.environ["DYNAMICSLICING_RUNS"] = "1"
+    programs = find_programs(args.paths)
+    start = time.perf_counter()
+    results = slice_all(programs, args.analysis, args.workers)
+    failed = [result for result in results if result["status"] != "ok"]
+    for result in failed:
+        print(f"\n{result['program']}:\n{result['error']}", file=sys.stderr)
+    print(f"{len(results) - len(failed)}/{len(results)} programs sliced in {time.perf_counter() - start:.3f}s")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
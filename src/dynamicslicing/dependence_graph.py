@@ -0,0 +1,106 @@
+import heapq
+from typing import Set, Iterable, Dict
+
+
+class DynamicDependenceGraph:
+    """
+    Dynamic dependence graph with one node per executed statement instance.
+    Data and control edges are resolved when the instance is recorded, using the last definition
+    of every variable and the latest instance of every if / loop header the line is control dependent on.
+    """
+
+    def __init__(self):
+        self.nodes = []  # to store one dict per statement instance: line, data and control dependences
+        self.last_def = dict()  # to store the node that last defined each variable
+        self.last_instance = dict()  # to store the latest node of each line (used for control edges)
+        self.instances = dict()  # to store all nodes of each line
+        self.aliases = dict()  # to store the variables referring to the same object, p2 = p1
+
+    def add_instance(self, line: int, control_lines: Iterable[int] = ()) -> int:
+        node = len(self.nodes)
+        control = [self.last_instance[header] for header in control_lines if header in self.last_instance]
+        self.nodes.append({"line": line, "data": set(), "control": control})
+        self.last_instance[line] = node
+        self.instances.setdefault(line, []).append(node)
+        return node
+
+    def use(self, node: int, variable: str) -> None:
+        definition = self.last_def.get(variable.split(".")[0])  # p.name depends on every modification of p
+        if definition is not None and definition != node:
+            self.nodes[node]["data"].add(definition)
+
+    def define(self, node: int, variable: str) -> None:
+        # variable gets a new value eg. y = 2, y += 2
+        self._unalias(variable)
+        self.last_def[variable] = node
+
+    def modify(self, node: int, variable: str) -> None:
+        # object is modified in place eg. p.name = x, ages[2] = 23, l.append(x)
+        variable = variable.split(".")[0]
+        self.use(node, variable)  # the rest of the object is unchanged
+        for name in self.aliases.get(variable, (variable,)):
+            self.last_def[name] = node
+
+    def alias(self, node: int, variable: str, other: str) -> None:
+        # variable refers to the same object as other eg. p2 = p1
+        self.use(node, other)
+        self.define(node, variable)
+        group = self.aliases.setdefault(other, {other})
+        group.add(variable)
+        self.aliases[variable] = group
+
+    def _unalias(self, variable: str) -> None:
+        group = self.aliases.pop(variable, None)
+        if group is not None:
+            group.discard(variable)
+
+    def slices(self, seeds: Dict[str, Iterable[int]], loop_lines: Set[int] = frozenset()) -> Dict[str, Set[int]]:
+        """
+        Lines of the backward slice of every criterion (name -> seed nodes), computed together: every node
+        has a bitset (an int) of the criteria that reach it, propagated along data and control edges
+        with one OR per edge. Edges mostly point to earlier nodes, so nodes are processed latest first
+        and most are processed once, whatever the number of criteria.
+        Once a loop header is reached, all its iterations are kept so that the sliced loop still terminates.
+        """
+        names = list(seeds)
+        masks = [0] * len(self.nodes)  # to store the criteria reaching each node, bit i for names[i]
+        for bit, name in enumerate(names):
+            for seed in seeds[name]:
+                if seed is not None:
+                    masks[seed] |= 1 << bit
+        done = [0] * len(self.nodes)  # to store the criteria already propagated from each node
+        loop_masks = dict()  # to store line -> criteria whose slice has all iterations of the loop
+        heap = [-node for node, mask in enumerate(masks) if mask]
+        heapq.heapify(heap)
+
+        def reach(node: int, mask: int) -> None:
+            if masks[node] | mask != masks[node]:
+                masks[node] |= mask
+                heapq.heappush(heap, -node)
+
+        while heap:
+            node = -heapq.heappop(heap)
+            mask = masks[node]
+            if mask == done[node]:
+                continue
+            new, done[node] = mask & ~done[node], mask
+            entry = self.nodes[node]
+            line = entry["line"]
+            if line in loop_lines and new & ~loop_masks.get(line, 0):
+                loop_masks[line] = loop_masks.get(line, 0) | new
+                for instance in self.instances[line]:
+                    reach(instance, new)
+            for dependence in entry["data"]:
+                reach(dependence, new)
+            for dependence in entry["control"]:
+                reach(dependence, new)
+
+        line_masks = dict()  # to store line -> criteria whose slice keeps the line
+        for node, mask in enumerate(masks):
+            if mask:
+                line = self.nodes[node]["line"]
+                line_masks[line] = line_masks.get(line, 0) | mask
+        return {name: {line for line, mask in line_masks.items() if mask >> bit & 1} for bit, name in enumerate(names)}
+
+    def lines(self, nodes: Iterable[int]) -> Set[int]:
+        return {self.nodes[node]["line"] for node in nodes}
@@ -0,0 +1,103 @@
+import re
+from shutil import copyfile
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import libcst as cst
+from dynapyt.analyses.BaseAnalysis import BaseAnalysis
+from dynapyt.instrument.CodeInstrumenter import CodeInstrumenter
+from dynapyt.instrument.IIDs import IIDs, Location
+from libcst import BaseCompoundStatement, CSTNode, SimpleStatementLine
+from libcst.metadata import PositionProvider
+
+
+class RegionInstrumenter(CodeInstrumenter):
+    """
+    dynapyt's instrumenter restricted to the statements that touch the given lines,
+    every other statement is left as it is and never fires a hook
+    """
+
+    def __init__(self, src: str, file_path: str, iids: IIDs, selected_hooks: Any, lines: Set[int]):
+        super().__init__(src, file_path, iids, selected_hooks)
+        self.lines = lines
+        self.skipped = set()  # to store the statements that are not instrumented
+
+    def on_visit(self, node: CSTNode) -> bool:
+        if isinstance(node, (SimpleStatementLine, BaseCompoundStatement)):
+            position = self.get_metadata(PositionProvider, node)
+            if not any(line in self.lines for line in range(position.start.line, position.end.line + 1)):
+                self.skipped.add(node)
+                return False  # neither the statement nor its children are visited
+        return super().on_visit(node)
+
+    def on_leave(self, original_node: CSTNode, updated_node: CSTNode) -> Any:
+        if original_node in self.skipped:
+            return updated_node
+        return super().on_leave(original_node, updated_node)
+
+
+class MemoryIIDs(IIDs):
+    """
+    dynapyt's iid map of a program instrumented in memory, numbered from 0 and never read from or written to disk
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.next_iid = 0
+        self.iid_to_location = dict()
+        self.location_to_iid = dict()
+
+    def store(self) -> None:
+        pass
+
+
+def _instrument(src: str, file_path: str, iids: IIDs, selected_hooks: Any, lines: Optional[Iterable[int]]) -> str:
+    wrapper = cst.metadata.MetadataWrapper(cst.parse_module(src))
+    if lines is None:
+        instrumenter = CodeInstrumenter(src, file_path, iids, selected_hooks)
+    else:
+        instrumenter = RegionInstrumenter(src, file_path, iids, selected_hooks, set(lines))
+    return "# DYNAPYT: DO NOT INSTRUMENT\n\n" + wrapper.visit(instrumenter).code
+
+
+def instrument_file(file_path: str, selected_hooks: Any, lines: Iterable[int]) -> int:
+    """
+    Same as dynapyt's instrument_file, but only the statements touching lines are instrumented
+    """
+    with open(file_path, "r") as file:
+        src = file.read()
+    if "DYNAPYT: DO NOT INSTRUMENT" in src:
+        print(f"{file_path} is already instrumented -- skipping it")
+        return 0
+    iids = IIDs(file_path)
+    code = _instrument(src, file_path, iids, selected_hooks, lines)
+
+    copyfile(file_path, re.sub(r"\.py$", ".py.orig", file_path))
+    with open(file_path, "w") as file:
+        file.write(code)
+    iids.store()
+    return 0
+
+
+def instrument_source(src: str, file_path: str, selected_hooks: Any,
+                      lines: Optional[Iterable[int]] = None) -> Tuple[str, Dict[int, Location]]:
+    """
+    Instrumented code of the program src (at file_path) and its iid map, nothing is written:
+    the instrumented_file of dynapyt (or of lines only) and the iids it would store
+    """
+    iids = MemoryIIDs(file_path)
+    return _instrument(src, file_path, iids, selected_hooks, lines), iids.iid_to_location
+
+
+def instrumented_lines(analyses: List[BaseAnalysis], program_file: str, source: Optional[str] = None) -> Optional[Set[int]]:
+    """
+    Lines the analyses need hooks for, None when one of them needs the whole program
+    """
+    if source is None:
+        with open(program_file, "r") as file:
+            source = file.read()
+    lines = set()
+    for analysis in analyses:
+        if not hasattr(analysis, "instrumented_lines"):
+            return None
+        lines.update(analysis.instrumented_lines(source))
+    return lines
@@ -0,0 +1,169 @@
+import argparse
+from typing import Any, Dict, Type, Tuple, Set
+
+from dynapyt.analyses.BaseAnalysis import BaseAnalysis
+
+from dynamicslicing import trace, utils
+from dynamicslicing.slice import Slice
+from dynamicslicing.slice_dataflow import SliceDataflow
+from dynamicslicing.slice_graph import SliceGraph
+
+ENGINES = {"slice": Slice, "dataflow": SliceDataflow, "graph": SliceGraph}
+
+def replay(source_path: str, analysis_class: Type[BaseAnalysis] = Slice) -> BaseAnalysis:
+    """
+    Feed a trace recorded by SliceRecord to the hooks of an analysis and write sliced.py next to the program
+    """
+    table, records = trace.read_trace(source_path)
+    files = table["files"]
+    analysis = trace.recorded(analysis_class, source_path, table)
+    analysis.begin_execution()
+    hooks = {kind: (getattr(analysis, name), arguments) for kind, (name, arguments) in utils.HOOKS.items()
+             if hasattr(analysis, name)}  # only the hooks the analysis implements
+    for file_id, iid, kind, flag, _ in records:
+        if kind in hooks:
+            hook, arguments = hooks[kind]
+            hook(*arguments(files[file_id], iid, flag))
+    analysis.end_execution()
+    return analysis
+
+
+def effects(kind: int, location: utils.NodeEntry) -> Tuple[Tuple, Tuple, Tuple]:
+    """
+    Variables an event (re)defines, modifies in place and uses, as in the hooks of SliceGraph
+    """
+    desc = location.desc
+    if kind == utils.WRITE and desc.write:
+        if desc.target != "Name":  # to handle p2.name = x, ages[2] = 23, ages[-1] += 50
+            return (), (utils.base_name(desc.write),), ()
+        elif location.kind == "AugAssign":  # to handle y += 2
+            return (desc.write,), (), (desc.write,)
+        return (desc.write,), (), (desc.alias,) if desc.alias is not None else ()
+    elif kind == utils.READ:
+        return (), (), tuple(utils.base_name(variable) for variable in desc.reads)
+    elif kind == utils.POST_CALL and desc.statement and desc.target == "Attribute":  # to handle a.append(x)
+        return (), (desc.write,), ()
+    elif kind == utils.ENTER_FOR:
+        return desc.targets, (), desc.reads
+    return (), (), ()
+
+
+def backward_slice(source_path: str, chunk_records: int = 1 << 20) -> Set[int]:
+    """
+    Slice a recorded trace by walking it backwards from its end, keeping only the variables whose
+    definition is still needed, so memory does not grow with the length of the trace.
+    Statement instances and dependences are the ones of SliceGraph (aliases are taken flow-insensitively);
+    once a loop header is kept all its iterations are, which may need another pass over the trace.
+    """
+    table, _ = trace.read_trace(source_path)
+    analysis = trace.recorded(SliceGraph, source_path, table)
+    analysis.begin_execution()
+
+    # static information of every (file, iid) the slice can depend on, filtered by line like SliceGraph._instance
+    events = dict()  # to store (file id, iid) -> node entry
+    aliases = dict()  # to store the variables referring to the same object, p2 = p1
+    for file_id, dyn_ast in enumerate(table["files"]):
+        for iid, location in analysis._node_table(dyn_ast).items():
+            line = location.statement_line
+            if line in analysis.slice_me_lines and line not in analysis.class_def_lines:
+                events[(file_id, iid)] = location
+                if location.desc.alias is not None:
+                    group = aliases.setdefault(location.desc.alias, {location.desc.alias})
+                    group.add(location.desc.write)
+                    aliases[location.desc.write] = group
+
+    # every record is reduced to one int code: file id, iid and event kind
+    kinds = (utils.WRITE, utils.READ, utils.POST_CALL, utils.ENTER_IF, utils.ENTER_FOR, utils.ENTER_WHILE)
+    steps = dict()  # to store code -> (line, is header event, defines, modifies, uses), SliceGraph has no jump hooks
+    for (file_id, iid), location in events.items():
+        for kind in kinds:
+            defines, modifies, uses = effects(kind, location)
+            modifies = tuple(name for variable in modifies for name in aliases.get(variable, (variable,)))
+            steps[(file_id << 36) | (iid << 4) | kind] = (location.statement_line, kind >= utils.ENTER_IF,
+                                                           defines, modifies, uses)
+    np = trace.np
+    relevant = np.fromiter(steps, dtype=np.uint64, count=len(steps)) if np is not None else None
+
+    loops = set()  # loop headers whose iterations are all kept
+    while True:
+        kept, new_loops = backward_pass(source_path, analysis, steps, relevant, loops, chunk_records)
+        if not new_loops:
+            return kept
+        loops.update(new_loops)  # iterations after the first kept one were already passed, walk again
+
+
+def backward_pass(source_path: str, analysis: SliceGraph, steps: Dict, relevant: Any, loops: Set[int],
+                  chunk_records: int) -> Tuple[Set[int], Set[int]]:
+    """
+    One walk of backward_slice over the trace: the lines kept, and the loop headers newly kept
+    whose iterations are not all in loops yet
+    """
+    control = analysis.control
+    np = trace.np
+    kept = set()
+    needed = set()  # variables whose last definition is in the slice
+    needed_headers = set()  # headers whose last instance is in the slice
+    new_loops = set()
+
+    def close(line, defines, modifies, uses):
+        if not (line == analysis.slicing_line or line in needed_headers or line in loops
+                or any(variable in needed for variable in defines) or any(variable in needed for variable in modifies)):
+            return
+        kept.add(line)
+        needed_headers.discard(line)
+        needed_headers.update(control.controllers.get(line, ()))
+        needed.difference_update(defines)
+        needed.update(modifies)  # an in-place modification also depends on the object before it
+        needed.update(uses)
+        if line == analysis.slicing_line:  # the criterion's variables, from before it unless it defines them
+            needed.update(variable for variable in map(utils.base_name, analysis.target_variables)
+                          if variable not in defines)
+        if line in control.jumps and line not in loops:
+            new_loops.add(line)
+
+    current = None  # line of the statement instance being collected, backwards
+    defines, modifies, uses = [], [], []
+    for chunk in trace.chunks_backward(source_path, chunk_records):
+        if np is not None:  # only the records of slice_me() are turned into python objects
+            codes = ((chunk["file"].astype(np.uint64) << np.uint64(36))
+                     | (chunk["iid"].astype(np.uint64) << np.uint64(4)) | chunk["kind"].astype(np.uint64))
+            codes = codes[np.isin(codes, relevant)].tolist()
+        else:
+            codes = [(file_id << 36) | (iid << 4) | kind for file_id, iid, kind, _, _ in chunk]
+        for code in reversed(codes):
+            step = steps.get(code)
+            if step is None:
+                continue
+            line, header, step_defines, step_modifies, step_uses = step
+            if line != current or header:  # a header event is the last event of its instance
+                if current is not None:
+                    close(current, defines, modifies, uses)
+                current = line
+                defines, modifies, uses = [], [], []
+            defines.extend(step_defines)
+            modifies.extend(step_modifies)
+            uses.extend(step_uses)
+    if current is not None:
+        close(current, defines, modifies, uses)
+    return kept, new_loops
+
+
+def slice_trace(source_path: str, engine: str = "slice") -> None:
+    """
+    Write sliced.py from a recorded trace, replayed into one of ENGINES or walked backwards
+    """
+    if engine == "backward":
+        graph = trace.recorded(SliceGraph, source_path, trace.read_trace(source_path)[0])
+        graph.begin_execution()
+        graph.write_slice(backward_slice(source_path))
+    else:
+        replay(source_path, ENGINES[engine])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Slice a program from the trace recorded by SliceRecord")
+    parser.add_argument("source_path", help="path of the recorded program, eg. dir/program.py")
+    parser.add_argument("--engine", choices=sorted(ENGINES) + ["backward"], default="slice",
+                        help="analysis the trace is replayed into, or backward to walk the trace from its end")
+    args = parser.parse_args()
+    slice_trace(args.source_path, args.engine)
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from dynamicslicing import utils
+
+ENABLED = bool(os.environ.get("DYNAMICSLICING_PROFILE"))  # profile every Slice, eg. DYNAMICSLICING_PROFILE=1 dynamicslicing run
+HOOKS = tuple(name for name, arguments in utils.HOOKS.values())
+HELPERS = ("check_overwritten", "write_slice")
+SAMPLE_EVENTS = 1024  # events between two samples of the datastore size
+
+
+class Profile:
+    """
+    Calls and cumulative time of the hooks of an analysis and of the helpers they call, and the size of its
+    datastore every sample_events events. The methods of the analysis instance are replaced by timed wrappers,
+    an analysis without a Profile runs unchanged. The time of a hook includes the helpers it calls.
+    """
+
+    def __init__(self, analysis: Any, helpers: Tuple[str, ...] = HELPERS, sample_events: int = SAMPLE_EVENTS):
+        self.analysis = analysis
+        self.hooks = dict()  # to store hook -> [calls, seconds]
+        self.helpers = dict()  # to store helper -> [calls, seconds]
+        self.sizes = []  # to store (events so far, datastore entries) every sample_events events
+        self.events = 0
+        self.sample_events = sample_events
+        self.end_execution = 0.0
+        self.start = time.perf_counter()
+        for name in HOOKS:
+            if hasattr(analysis, name):
+                self.hooks[name] = [0, 0.0]
+                setattr(analysis, name, self._hook(getattr(analysis, name), self.hooks[name]))
+        for name in helpers:
+            if hasattr(analysis, name):
+                self.helpers[name] = [0, 0.0]
+                setattr(analysis, name, self._helper(getattr(analysis, name), self.helpers[name]))
+        if hasattr(analysis, "_node_entry"):
+            # the first lookup of a file builds its node table, instead of get_node_by_location / m.matches per event
+            self.helpers["_node_entry"] = [0, 0.0]
+            self.helpers["node_table"] = [0, 0.0]
+            analysis._node_entry = self._node_entry(analysis._node_entry)
+        if hasattr(analysis, "end_execution"):
+            analysis.end_execution = self._end_execution(analysis.end_execution)
+
+    def _hook(self, hook: Callable, cost: List) -> Callable:
+        def timed(*args):
+            start = time.perf_counter()
+            result = hook(*args)
+            cost[1] += time.perf_counter() - start
+            cost[0] += 1
+            self.events += 1
+            if self.events % self.sample_events == 0:
+                self.sizes.append((self.events, len(getattr(self.analysis, "datastore", ()))))
+            return result
+        return timed
+
+    @staticmethod
+    def _helper(helper: Callable, cost: List) -> Callable:
+        def timed(*args):
+            start = time.perf_counter()
+            result = helper(*args)
+            cost[1] += time.perf_counter() - start
+            cost[0] += 1
+            return result
+        return timed
+
+    def _node_entry(self, lookup: Callable) -> Callable:
+        analysis = self.analysis
+        lookups, builds = self.helpers["_node_entry"], self.helpers["node_table"]
+
+        def timed(dyn_ast: str, iid: int):
+            cost = lookups if dyn_ast in analysis.node_tables else builds
+            start = time.perf_counter()
+            result = lookup(dyn_ast, iid)
+            cost[1] += time.perf_counter() - start
+            cost[0] += 1
+            return result
+        return timed
+
+    def _end_execution(self, end_execution: Callable) -> Callable:
+        def timed():
+            start = time.perf_counter()
+            end_execution()
+            self.end_execution = time.perf_counter() - start
+            if getattr(self.analysis, "write_files", False):
+                self.write(os.path.join(os.path.dirname(self.analysis.source_path), "profile.json"))
+        return timed
+
+    def report(self) -> Dict:
+        """
+        The counters as a dict: calls, seconds and microseconds per call of every hook and helper,
+        datastore size samples, events, the time since the analysis was created and the time of end_execution
+        """
+        def costs(table: Dict[str, List]) -> Dict:
+            return {name: {"calls": calls, "seconds": seconds, "us_per_call": seconds / calls * 1e6 if calls else 0.0}
+                    for name, (calls, seconds) in table.items()}
+
+        return {"program": getattr(self.analysis, "source_path", None), "events": self.events,
+                "seconds": time.perf_counter() - self.start, "end_execution_seconds": self.end_execution,
+                "hooks": costs(self.hooks), "helpers": costs(self.helpers),
+                "datastore": {"entries": len(getattr(self.analysis, "datastore", ())), "samples": self.sizes}}
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=1)
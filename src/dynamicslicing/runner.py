@@ -0,0 +1,106 @@
+import atexit
+import signal
+import sys
+import importlib.util
+import types
+from contextlib import contextmanager
+from os import remove
+from os.path import abspath, splitext, exists
+from shutil import copyfile, move
+from typing import Dict, Iterator, List, Type
+
+from dynapyt.analyses.BaseAnalysis import BaseAnalysis
+from dynapyt.utils.hooks import get_hooks_from_analysis
+
+from dynamicslicing.cache import instrument_file, instrument_source
+from dynamicslicing.instrument import instrumented_lines
+
+
+@contextmanager
+def runtime(analyses: List[BaseAnalysis]) -> Iterator[types.ModuleType]:
+    """
+    A dynapyt runtime of its own for one run of the analyses: its state is global to the module, so the run gets
+    a freshly imported dynapyt.runtime and the module imported before (if any) is put back afterwards.
+    Runs in the same process are isolated as long as they do not overlap, eg. one test at a time in each
+    pytest-xdist worker. end_execution only runs when the program completes: when it raises, the analyses
+    are dropped without writing a slice and the exception propagates
+    """
+    import dynapyt
+
+    previous = sys.modules.pop("dynapyt.runtime", None)
+    import dynapyt.runtime as _rt
+
+    # set_analysis makes SIGINT / SIGTERM and the exit of the interpreter call end_execution, for this run only
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        _rt.analyses = None
+        _rt.set_analysis(analyses)
+        for analysis in analyses:
+            if hasattr(analysis, "begin_execution"):
+                analysis.begin_execution()
+        yield _rt
+        _rt.end_execution()
+    finally:
+        atexit.unregister(_rt.end_execution)
+        for signum, handler in handlers.items():
+            if handler is not None and signal.getsignal(signum) is not handler:
+                signal.signal(signum, handler)
+        del sys.modules["dynapyt.runtime"]
+        if previous is not None:
+            sys.modules["dynapyt.runtime"] = dynapyt.runtime = previous
+
+
+def run_program(program_file: str, analysis_class: Type[BaseAnalysis]) -> BaseAnalysis:
+    """
+    Instrument program_file for one analysis, run it (the analysis writes sliced.py next to it)
+    and restore the uninstrumented program, the same steps as tests/run_single_test.py.
+    An analysis that can reslice a stored run of the same code is not run again
+    """
+    orig_program_file = splitext(program_file)[0] + ".py.orig"
+    # make sure to instrument the uninstrumented version
+    with open(program_file, "r") as file:
+        if "DYNAPYT: DO NOT INSTRUMENT" in file.read():
+            if not exists(orig_program_file):
+                raise ValueError(f"Could find only the instrumented program {program_file}")
+            copyfile(orig_program_file, program_file)
+
+    analysis = analysis_class(program_file)
+    if hasattr(analysis, "reslice") and analysis.reslice():  # only the slicing criterion changed since the last run
+        return analysis
+    selected_hooks = get_hooks_from_analysis([analysis])
+    instrument_file(program_file, selected_hooks, instrumented_lines([analysis], program_file))
+    try:
+        with runtime([analysis]):
+            spec = importlib.util.spec_from_file_location("dynamicslicing_program", program_file)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+    finally:
+        move(orig_program_file, program_file)
+        if exists(splitext(program_file)[0] + "-dynapyt.json"):
+            remove(splitext(program_file)[0] + "-dynapyt.json")
+    return analysis
+
+
+def run_source(source: str, analyses: List[BaseAnalysis], program_file: str = "program.py") -> Dict[str, str]:
+    """
+    Instrument and run the program source in memory, with program_file as its path (in tracebacks and as dyn_ast),
+    nothing is read from or written to disk but the cache. Returns criterion name ("" when unnamed) -> sliced program.
+    Only for analyses with in-memory state, not those that replay the run elsewhere (SliceBackground, SliceRecord)
+    """
+    if "DYNAPYT: DO NOT INSTRUMENT" in source:
+        raise ValueError(f"{program_file} is already instrumented")
+    program_file = abspath(program_file)
+    code, locations = instrument_source(program_file, source, get_hooks_from_analysis(analyses),
+                                        instrumented_lines(analyses, program_file, source))
+    for analysis in analyses:
+        analysis.source = source
+        analysis.locations = locations
+        analysis.write_files = False
+    with runtime(analyses):
+        module = types.ModuleType("dynamicslicing_program")
+        module.__file__ = program_file
+        exec(compile(code, program_file, "exec"), module.__dict__)
+    sliced = dict()
+    for analysis in analyses:
+        sliced.update(getattr(analysis, "sliced", {}))
+    return sliced
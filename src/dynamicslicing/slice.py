@@ -1,242 +1,274 @@
-import os
-from typing import List, Callable, Any, Optional, Tuple, Dict, Iterable
+from array import array
+from collections import deque
+from functools import partial
+from typing import List, Callable, Any, Optional, Tuple, Dict, Iterable, Set
 
 from dynapyt.analyses.BaseAnalysis import BaseAnalysis
-from dynapyt.utils.nodeLocator import get_node_by_location
 
-from dynamicslicing import utils
-import libcst.matchers as m
+from dynamicslicing import cache, profiling, utils
+
+RUN_EVENTS = 1 << 24  # events of a run kept for reslice (8 bytes each), a longer run can only be resliced as a whole
 
 
 class Slice(BaseAnalysis):
-    def __init__(self, source_path):
+    def __init__(self, source_path, profile: bool = profiling.ENABLED):
         super().__init__()
         self.source_path = source_path
 
-        self.lines_to_keep = []
-        self.target_variables = []
+        self.lines_to_keep = set()
+        self.kept_by_conditions = set()  # to store the lines kept at runtime, when a condition that reads them fails
+        self.target_variables = set()
         self.slicing_line = -1
-        self.class_def_lines = []
-        self.datastore = dict()  # to store line numbers, variable reads and writes
+        self.class_def_lines = set()
+        self.datastore = dict()  # to store line number -> utils.Record of its variable reads and writes
         self.aliases = dict()   # to store alias variables with line number
+        self.writers = dict()  # to store the lines currently writing each variable, reverse index of datastore
+        self.node_tables = dict()  # to store iid -> node lookup table of every instrumented file
+        self.source = None  # the original program when it is instrumented in memory (runner.run_source), else read from disk
+        self.locations = None  # iid map of the program instrumented in memory, else read from <program>-dynapyt.json
+        self.sliced = dict()  # to store criterion name ("" when unnamed) -> its sliced program
+        self.write_files = True  # write sliced.py next to the program, else the slices are only kept in self.sliced
+        self.symbols = utils.Symbols()  # to store the ids of the variables, the datastore only holds ids
+        self.control = utils.ControlDependence({}, {}, {}, {}, {})  # static bodies / else branches / jumps of every header
         self.code = ""
+        self.return_vals = None  # utils.get_slice_line of the program, stored with its run to reslice it
+        self.run_files = utils.FileIds()
+        # to store every event of the run packed in an int, to reslice it later (only kept when runs are stored)
+        self.run_events = array("Q") if cache.RUNS else deque(maxlen=0)
+        # to store the calls and time of the hooks when profiled, profile.report() after end_execution
+        self.profile = profiling.Profile(self) if profile else None
 
     def begin_execution(self) -> None:
-        with open(os.path.splitext(self.source_path)[0] + '.py.orig', "r") as file:
-            source = file.read()
-            self.code = source
+        source = utils.original_source(self.source_path, self.source)
+        self._set_source(source)
+
+    def _set_source(self, source: str) -> None:
+        self.code = source
         if "DYNAPYT: DO NOT INSTRUMENT" not in source:  # only on un-Instrumented file
-            return_vals = utils.get_slice_line(source)
-            self.lines_to_keep = return_vals[0]
-            self.target_variables = return_vals[1]
+            return_vals, self.control = cache.static_analysis(source)
+            self.return_vals = return_vals
+            self.lines_to_keep = set(return_vals[0])
+            self.target_variables = set(map(self.symbols.intern, return_vals[1]))
             self.slicing_line = return_vals[2]
-            self.class_def_lines = return_vals[3]
+            self.class_def_lines = set(return_vals[3])
         # print(self.lines_to_keep)
         # print(self.target_variables)
         # print(self.slicing_line)
         # print(self.class_def_lines)
 
+    def instrumented_lines(self, source: str) -> Set[int]:
+        """
+        Lines of the program to instrument, the hooks of any other line would be ignored
+        """
+        return_vals = cache.static_analysis(source)[0]
+        return utils.get_instrumented_lines(source, return_vals, range(1, source.count("\n") + 2))
+
+    def _node_entry(self, dyn_ast: str, iid: int) -> utils.NodeEntry:
+        table = self.node_tables.get(dyn_ast)
+        if table is None:  # resolve all iids of the file once, instead of searching the tree on each event
+            table = self.symbols.node_table(cache.node_table(dyn_ast, self.source, self.locations))
+            self.node_tables[dyn_ast] = table
+        return table[iid]
+
     def write(self, dyn_ast: str, iid: int, old_vals: List[Callable], new_val: Any) -> Any:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        self.run_events.append(self.run_files[dyn_ast] | iid << 5 | utils.WRITE)
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
         # print("write:", location.start_line)
         if location.start_line not in self.class_def_lines:
             if location.start_line in self.datastore:
-                if m.matches(node, m.Assign()):
-                    if m.matches(node.targets[0].target, m.Attribute()):  # to handle obj access eg. p2.name
-                        self.datastore[location.start_line][
-                            "write"] = f"{node.targets[0].target.value.value}.{node.targets[0].target.attr.value}"
-                    else:
-                        if m.matches(node.targets[0].target, m.Subscript()):  # to handle ages[2] = 23 ie subscript as target
-                            self.check_overwritten(node)  # check if value is overwritten
-                            self.datastore[location.start_line]["write"] = node.targets[0].target.value.value
-                        else:  # to handle y = 2
-                            self.check_overwritten(node)  # check if value is overwritten
-                            if self.datastore.get(location.start_line):
-                                self.datastore[location.start_line]["write"] = node.targets[0].target.value
-                            if m.matches(node, m.Assign(value=m.Name())) and not m.matches(node, m.Assign(value=m.Call())):  # to handle obj aliases p2 = p1
-                                self.aliases[node.targets[0].target.value] = [node.value.value, location.start_line]
-
-                elif m.matches(node, m.AugAssign()):  # to handle y += 2
-                    if m.matches(node.target, m.Subscript()):  # to handle ages[-1] += 50
-                        self.datastore[location.start_line]["write"] = node.target.value.value
-                    elif m.matches(node.target, m.Attribute()): # to handle p.name += " World"
-                        self.datastore[location.start_line]["write"] = f"{node.target.value.value}.{node.target.attr.value}"
-                    else:
-                        self.datastore[location.start_line]["write"] = node.target.value
+                if location.kind == "Assign":
+                    if desc.target == "Attribute":  # to handle obj access eg. p2.name
+                        self._set_write(location.start_line, desc.write)
+                    else:  # to handle ages[2] = 23 ie subscript as target and y = 2
+                        self.check_overwritten(desc)  # check if value is overwritten
+                        if self.datastore.get(location.start_line):
+                            self._set_write(location.start_line, desc.write)
+                        if desc.alias is not None:  # to handle obj aliases p2 = p1
+                            self.aliases[desc.write] = [desc.alias, location.start_line]
+
+                elif location.kind == "AugAssign":  # to handle y += 2, ages[-1] += 50 and p.name += " World"
+                    self._set_write(location.start_line, desc.write)
             else:
-                if m.matches(node, m.Assign()):
-                    if m.matches(node.targets[0].target, m.Attribute()):  # to handle obj access eg. p2.name
-                        self.datastore[location.start_line] = {"read": set(),
-                                                               "write": f"{node.targets[0].target.value.value}.{node.targets[0].target.attr.value}"}
-                    else:
-                        if m.matches(node.targets[0].target,
-                                     m.Subscript()):  # to handle ages[2] = 23 ie subscript as target
-                            self.check_overwritten(node)  # check if value is overwritten
-                            self.datastore[location.start_line] = {"read": set(),
-                                                                   "write": node.targets[0].target.value.value}
-                        else:  # to handle y = 2
-                            self.check_overwritten(node)  # check if value is overwritten
-                            self.datastore[location.start_line] = {"read": set(), "write": node.targets[0].target.value}
-
-                            # TODO: add obj alias code p2 = p1 ?
-
-                elif m.matches(node, m.AugAssign()):  # to handle y += 2
-                    if m.matches(node.target, m.Subscript()):  # to handle ages[-1] += 50
-                        self.datastore[location.start_line] = {"read": set(), "write": node.target.value.value}
-                    else:
-                        self.datastore[location.start_line] = {"read": set(), "write": node.target.value}
+                if location.kind == "Assign":
+                    if desc.target != "Attribute":  # to handle ages[2] = 23 ie subscript as target and y = 2
+                        self.check_overwritten(desc)  # check if value is overwritten
+                    self._store(location.start_line, utils.Record(write=desc.write))
+
+                    # TODO: add obj alias code p2 = p1 ?
+
+                elif location.kind == "AugAssign":  # to handle y += 2
+                    self._store(location.start_line, utils.Record(write=desc.write))
 
     def read(self, dyn_ast: str, iid: int, val: Any) -> Any:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        self.run_events.append(self.run_files[dyn_ast] | iid << 5 | utils.READ)
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
         # print("read:", location.start_line)
-        if location.start_line not in self.class_def_lines and not m.matches(node, m.Subscript()):
-            if location.start_line in self.datastore:
-                if m.matches(node, m.Attribute()):  # to handle object access eg: p.name
-                    self.datastore[location.start_line]["read"].add(f"{node.value.value}.{node.attr.value}")
-                else:
-                    self.datastore[location.start_line]["read"].add(node.value)
+        if location.start_line not in self.class_def_lines and desc.reads:  # subscripts are not tracked
+            if location.start_line in self.datastore:  # to handle variables and object access eg: p.name
+                self.datastore[location.start_line].add_reads(desc.reads)
             else:
-                if m.matches(node, m.Attribute()):  # To handle object access eg: p.name
-                    self.datastore[location.start_line] = {"read": {f"{node.value.value}.{node.attr.value}"},
-                                                           "write": ""}
-                else:
-                    self.datastore[location.start_line] = {"read": {node.value}, "write": ""}
+                self._store(location.start_line, utils.Record(tuple(dict.fromkeys(desc.reads))))
 
     def post_call(self, dyn_ast: str, iid: int, result: Any, call: Callable, pos_args: Tuple, kw_args: Dict, ) -> Any:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
-        # print(node)
+        self.run_events.append(self.run_files[dyn_ast] | iid << 5 | utils.POST_CALL)
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
         if location.start_line not in self.class_def_lines:
             if location.start_line in self.datastore:
-                if m.matches(node.func, m.Attribute()):  # to handle normal function calls eg. a.append(), obj.funct()
-                    if not self.datastore[location.start_line]["write"]:  # put object into write
-                        self.datastore[location.start_line]["write"] = node.func.value.value
-                    for arg in node.args:  # to handle all positional arguments
-                        if m.matches(arg.value, m.Attribute()):  # to handle l.append(p.name)
-                            self.datastore[location.start_line]["read"].add(
-                                f"{arg.value.value.value}.{arg.value.attr.value}")
-
-                        elif m.matches(arg.value, m.Name()):  # to handle normal args (func(12), func(x))
-                            self.datastore[location.start_line]["read"].add(arg.value.value)
+                if desc.target == "Attribute":  # to handle normal function calls eg. a.append(), obj.funct()
+                    if not self.datastore[location.start_line].write:  # put object into write
+                        self._set_write(location.start_line, desc.write)
+                    # to handle all positional arguments eg. func(x), l.append(p.name)
+                    self.datastore[location.start_line].add_reads(desc.reads)
 
             else:
-                if m.matches(node.func, m.Attribute()):  # to handle normal function calls eg. a.append(), obj.funct()
-                    for arg in node.args:  # to handle all positional arguments
-                        if m.matches(arg.value, m.Attribute()):  # to handle l.append(p.name)
-                            self.datastore[location.start_line] = {
-                                "read": {f"{arg.value.value.value}.{arg.value.attr.value}"},
-                                "write": node.func.value.value}
-                        elif m.matches(arg.value, m.Name()):  # to handle normal args (func(12), func(x))
-                            self.datastore[location.start_line] = {"read": {arg.value.value},
-                                                                   "write": node.func.value.value}
-                elif m.matches(node.func, m.Name()):    # to handle function calls without objects
-                    if node.func.value == "print":  # to handle just print("string")
-                        if m.matches(node.args[0].value, m.SimpleString()):  # TODO: add logic to handle multiple string args
-                            self.datastore[location.start_line] = {"read": set(), "write": ''}
+                if desc.target == "Attribute":  # to handle normal function calls eg. a.append(), obj.funct()
+                    if desc.reads:  # the last positional argument eg. func(x), l.append(p.name)
+                        self._store(location.start_line, utils.Record(desc.reads[-1:], desc.write))
+                elif desc.print_literal:  # to handle just print("string")
+                    # TODO: add logic to handle multiple string args
+                    self._store(location.start_line, utils.Record())
 
     def enter_if(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        self._log(self.run_files[dyn_ast] | iid << 5 | (utils.FLAG if cond_value else 0) | utils.ENTER_IF)
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
         # print("entering if:", location.start_line)
         if cond_value:
-            self.datastore[location.start_line]["is_cond"] = True
-            count = str(node.body).count("SimpleStatementLine")
-            self.datastore[location.start_line]["body"] = list(
-                range(location.start_line + 1, location.start_line + 1 + count))
+            record = self.datastore[location.start_line]
+            record.is_cond = True
+            record.body = range(location.start_line + 1, location.start_line + 1 + desc.body_count)
         else:
             # add the variables in the condition of the if that fails
-            for cond in self.datastore[location.start_line]["read"]:
-                x = [k for k, v in self.datastore.items() if v["write"] == cond]
-                if len(x) > 0:
-                    self.lines_to_keep.extend(x)
-
-            if m.matches(node.orelse, m.Else()):
-                count = str(node.orelse).count("SimpleStatementLine")
-                if location.end_line - count not in self.datastore:
-                    if not m.matches(node.test.left, m.Attribute()):    # to handle normal variables
-                        if count > 1:
-                            self.datastore[location.end_line - count] = {"read": set(), "write": '',
-                                                                 "is_cond": True, "body": list(range(location.end_line - count + 1, location.end_line + count - 1))}
-
-                        else:
-                            self.datastore[location.end_line - count] = {"read": set(), "write": '',
-                                                                     "is_cond": True, "body": list(
-                                    range(location.end_line, location.end_line + count))}
-
-                        # add conditional variables to read
-                        for comparison in m.findall(node.test, m.Name()):
-                            self.datastore[location.end_line - count]["read"].add(comparison.value)
-                        for comparator in m.findall(node.test, m.Name()):
-                            self.datastore[location.end_line - count]["read"].add(comparator.value)
-
-                    else:   # to handle objects eg p.age
-                        if count > 1:
-                            self.datastore[location.end_line - count] = {"read": set(), "write": '',
-                                                                 "is_cond": True, "body": list(range(location.end_line - count + 1, location.end_line + count - 1))}
-
-                        else:
-                            self.datastore[location.end_line - count] = {"read": set(), "write": '',
-                                                                         "is_cond": True, "body": list(
-                                    range(location.end_line, location.end_line + count))}
-
-                        # add conditional variables to read
-                        for comparison in m.findall(node.test, m.Attribute()):
-                            self.datastore[location.end_line - count]["read"].add(f"{comparison.value.value}.{comparison.attr.value}")
-                        for comparator in m.findall(node.test, m.ComparisonTarget(comparator=m.Attribute())):
-                            self.datastore[location.end_line - count]["read"].add(f"{comparator.comparator.value.value}.{comparator.comparator.attr.value}")
+            for cond in self.datastore[location.start_line].read:
+                self.lines_to_keep.update(self.writers.get(cond, ()))
+                self.kept_by_conditions.update(self.writers.get(cond, ()))
+
+            if location.start_line in self.control.orelse:
+                else_line, else_body = self.control.orelse[location.start_line]
+                if else_line not in self.datastore:
+                    # to handle normal variables, and objects eg p.age
+                    # add conditional variables to read
+                    self._store(else_line, utils.Record(tuple(dict.fromkeys(desc.test_reads)), is_cond=True, body=else_body))
 
     def enter_for(self, dyn_ast: str, iid: int, next_value: Any, iterable: Iterable) -> Optional[Any]:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        self._log(self.run_files[dyn_ast] | iid << 5 | utils.ENTER_FOR)
+        location = self._node_entry(dyn_ast, iid)
         # print("entering for:", location.start_line)
-        # print(node)
-        if self.datastore.get(location.start_line):
-            self.datastore[location.start_line]["is_cond"] = True
+        record = self.datastore.get(location.start_line)
+        if record:
+            record.is_cond = True
         else:
-            self.datastore[location.start_line] = {"read": set(), "write": '', "is_cond": True}
-        self.datastore[location.start_line]["body"] = list(range(location.start_line + 1, location.end_line + 1))
+            record = utils.Record(is_cond=True)
+            self._store(location.start_line, record)
+        record.body = self.control.body.get(location.start_line, ())
 
     def enter_while(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        self._log(self.run_files[dyn_ast] | iid << 5 | (utils.FLAG if cond_value else 0) | utils.ENTER_WHILE)
+        location = self._node_entry(dyn_ast, iid)
         if cond_value:
-            self.datastore[location.start_line]["is_cond"] = True
-            self.datastore[location.start_line]["body"] = list(range(location.start_line + 1, location.end_line + 1))
-            for counter in list(self.datastore[location.start_line]["read"]):
-                for i, ss in enumerate(m.findall(node, m.SimpleStatementLine())):
-                    if m.matches(ss.body[0], m.Assign()):
-                        pass  # TODO: add logic to handle assign to counter variable
-                    elif m.matches(ss.body[0], m.AugAssign()):
-                        if ss.body[0].target.value == counter:
-                            counter_line = utils.get_location_from_node(self.code, ss)
-                            self.datastore[counter_line] = {"read": set(), "write": counter}
+            record = self.datastore[location.start_line]
+            record.is_cond = True
+            record.body = self.control.body.get(location.start_line, ())
+            for counter in record.read:
+                # TODO: add logic to handle assign to counter variable
+                for target, counter_line in location.desc.counters:
+                    if target == counter:
+                        self._store(counter_line, utils.Record(write=counter))
 
     def _continue(self, dyn_ast: str, iid: int) -> Optional[bool]:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        self.run_events.append(self.run_files[dyn_ast] | iid << 5 | utils.CONTINUE)
+        location = self._node_entry(dyn_ast, iid)
         # print("continue called:", location.start_line)
-        # print(node)
-        count = str(node.body).count("SimpleStatementLine")
-        self.datastore[location.start_line + count - 1] = {"read": set(), "write": '_JMP_'}
+        for line in location.desc.jumps:  # the continue of the block, not every continue of the loop
+            self._store(line, utils.Record(write=utils.JUMP))
 
 
     def _break(self, dyn_ast: str, iid: int) -> Optional[bool]:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        self.run_events.append(self.run_files[dyn_ast] | iid << 5 | utils.BREAK)
+        location = self._node_entry(dyn_ast, iid)
         # print("break called:", location.start_line)
-        # print(node)
-        count = str(node.body).count("SimpleStatementLine")
-        self.datastore[location.start_line + count - 1] = {"read": set(), "write": '_JMP_'}
+        for line in location.desc.jumps:  # the break of the block, not every break of the loop
+            self._store(line, utils.Record(write=utils.JUMP))
 
 
-    def end_execution(self) -> None:
-        with open(os.path.splitext(self.source_path)[0] + '.py.orig', "r") as file:
-            source = file.read()
+    def _log(self, event: int) -> None:
+        # checked on branches only, a run can only grow without bounds in a loop
+        self.run_events.append(event)
+        if len(self.run_events) >= RUN_EVENTS:
+            self.run_events = deque(maxlen=0)  # events are dropped from now on
 
+    def end_execution(self) -> None:
+        source = utils.original_source(self.source_path, self.source)
+        if cache.RUNS and self.return_vals is not None:
+            cache.store_run(self.source_path, source, {
+                "return_vals": self.return_vals, "variables": self.symbols.names,
+                "datastore": self.datastore, "aliases": self.aliases, "writers": self.writers,
+                "kept_by_conditions": self.kept_by_conditions, "files": self.run_files.files,
+                "node_tables": self.node_tables,
+                "events": self.run_events if isinstance(self.run_events, array) else None})
+        self.write_slice(source)
+
+    def reslice(self) -> bool:
+        """
+        Write sliced.py from the stored run of a version of the program that differs only in its comments,
+        eg. in the line of the slicing criterion, instead of instrumenting and running it again.
+        When the run had hooks on statements the new criterion does not instrument, only the events
+        of the other statements are replayed, so the slice is the one of a new run.
+        False when there is no such run, or when the new criterion needs lines the run had no hooks for
+        """
+        if self.source is None:
+            with open(self.source_path, "r") as file:
+                source = file.read()
+        else:
+            source = self.source
+        if "DYNAPYT: DO NOT INSTRUMENT" in source:
+            return False
+        state = cache.load_run(self.source_path, source)
+        if state is None:
+            return False
+        # the code of both is the same up to comments, the lines of the run only differ by its criteria
+        lines = self.instrumented_lines(source)
+        if not lines <= utils.get_instrumented_lines(source, state["return_vals"], range(1, source.count("\n") + 2)):
+            return False
+        # same rule as instrument.RegionInstrumenter: a node has hooks when its statement touches the lines
+        kept = {(file_id << 32) | iid for file_id, dyn_ast in enumerate(state["files"])
+                for iid, entry in state["node_tables"].get(dyn_ast, {}).items()
+                if not lines.isdisjoint(range(entry.statement_line, entry.statement_end + 1))}
+        every = sum(len(table) for table in state["node_tables"].values())
+        if len(kept) < every and state["events"] is None:
+            return False
+
+        for name in state["variables"]:  # the same ids as in the run
+            self.symbols.intern(name)
+        self.node_tables = state["node_tables"]
+        self._set_source(source)
+        if len(kept) == every:  # the run had the hooks of a new run, its datastore is the same
+            self.datastore, self.aliases, self.writers = state["datastore"], state["aliases"], state["writers"]
+            self.lines_to_keep.update(state["kept_by_conditions"])
+        else:
+            handlers = dict()  # to store event -> its hook of Slice with the arguments bound, decoded once
+            for event in state["events"]:
+                handler = handlers.get(event)
+                if handler is None:
+                    kind, dyn_ast, iid, flag = utils.decode(event, state["files"])
+                    name, arguments = utils.HOOKS[kind]
+                    handler = handlers[event] = (partial(getattr(Slice, name), self, *arguments(dyn_ast, iid, flag))
+                                                 if event >> 5 in kept else _skip)
+                handler()
+        self.write_slice(source)
+        return True
+
+    def write_slice(self, source: str) -> None:
+        """
+        Backward pass over the datastore, from the slicing criterion, writes sliced.py
+        """
         self.datastore = dict(sorted(self.datastore.items(), reverse=True))
-        self.lines_to_keep = self.lines_to_keep + self.class_def_lines
+        self.lines_to_keep.update(self.class_def_lines)
+        self.target_variables = set(self.target_variables)
+        base = self.symbols.base
         # print(self.datastore)
         # print(self.aliases)
         # print(self.target_variables)
@@ -245,60 +277,73 @@ class Slice(BaseAnalysis):
             # print(self.target_variables)
             # print(line, val)
             if line <= self.slicing_line:
-                if (not val.get("is_cond")
-                        and val["write"] in self.target_variables
-                        or ("." in val["write"] and val["write"][:val["write"].index(".")] in self.target_variables)):
-                    self.lines_to_keep.append(line)
-                    if len(val["read"]) > 0 and len([x for x in val["read"] if x not in self.target_variables]) > 0:
-                        self.target_variables.extend(val["read"])
+                write = val.write
+                left = base[write]
+                if (not val.is_cond and write in self.target_variables
+                        or left != write and left in self.target_variables):
+                    self.lines_to_keep.add(line)
+                    self.target_variables.update(val.read)
 
                 # DATA-FLOW : for aliases
-                if (not val.get("is_cond")
-                        and ("." in val["write"] and val["write"][:val["write"].index(".")] in list(self.aliases.keys()))
-                        or (val["write"] in list(self.aliases.keys()) and any(val["write"]+"." in r for r in val["read"]))):
-                    left = val["write"][:val["write"].index(".")] if "." in val["write"] else val["write"]
-                    right = self.aliases[left][0]
-                    loc = self.aliases[left][1]
+                if (not val.is_cond
+                        and (left != write and left in self.aliases)
+                        or (write in self.aliases and any(base[r] == write != r for r in val.read))):
+                    right, loc = self.aliases[left]
                     if right in self.target_variables:
-                        self.lines_to_keep.append(line)
-                        self.lines_to_keep.append(loc)
-                        self.target_variables.extend(val["read"])
+                        self.lines_to_keep.add(line)
+                        self.lines_to_keep.add(loc)
+                        self.target_variables.update(val.read)
 
                 # CONTROL-FLOW
-                if val.get("is_cond") == True:
-                    for body_line in reversed(val["body"]):
-                        if self.datastore.get(body_line) and body_line <= self.slicing_line:
-                            if ((self.datastore.get(body_line)["write"] in self.target_variables)
-                                    or ("." in self.datastore.get(body_line)["write"] and self.datastore.get(body_line)["write"][:self.datastore.get(body_line)["write"].index(".")] in self.target_variables)
-                                    or (self.datastore.get(body_line)["write"] == "_JMP_" and line in self.lines_to_keep)):
-                                self.lines_to_keep.append(body_line)
-                                self.lines_to_keep.append(line)
-                                if len(val["read"]) > 0 and len([x for x in val["read"] if x not in self.target_variables]) > 0:
-                                    self.target_variables.extend(val["read"])
-
-
-
+                if val.is_cond == True:
+                    for body_line in reversed(val.body):
+                        body = self.datastore.get(body_line)
+                        if body and body_line <= self.slicing_line:
+                            if (self.is_target(body.write)
+                                    or (body.write == utils.JUMP and line in self.lines_to_keep)):
+                                self.lines_to_keep.add(body_line)
+                                self.lines_to_keep.add(line)
+                                self.target_variables.update(val.read)
 
                         if body_line in self.lines_to_keep:  # if the body of conditional is to be kept, then the conditional line should also be kept
-                            self.lines_to_keep.append(line)
-                            self.target_variables.extend(self.datastore[line]["read"])
+                            self.lines_to_keep.add(line)
+                            self.target_variables.update(val.read)
 
                         if line in self.lines_to_keep:  # if the condition is to be kept, the variables in the condition are target vars
-                            if self.datastore.get(body_line):
-                                if self.datastore.get(body_line)["write"] in list(val["read"]):
-                                    self.lines_to_keep.append(body_line)
+                            if body and body.write in val.read:
+                                self.lines_to_keep.add(body_line)
 
                     if line not in self.lines_to_keep:   # if conditional is not to be kept, remove the definitions of variables used in the condition
-                        for cond in val["read"]:
-                            rem_locs = [k for k, v in self.datastore.items() if v["write"] == cond]
-                            self.lines_to_keep = [x for x in self.lines_to_keep if x not in rem_locs]
+                        for cond in val.read:
+                            self.lines_to_keep.difference_update(self.writers.get(cond, ()))
 
         sliced = utils.remove_lines(source, self.lines_to_keep)
-        with open(os.path.dirname(self.source_path) + '/sliced.py', "w") as updated_file:
-            updated_file.write(sliced)
-
-    def check_overwritten(self, node):
-        if m.matches(node, m.Assign(value=m.Integer() | m.Float() | m.Imaginary() | m.SimpleString() | m.FormattedString() | m.ConcatenatedString())):
-            for line, val in list(self.datastore.items()):
-                if node.targets[0].target.value == val["write"]:
-                    self.datastore.pop(line, None)  # value of the variable is overwritten, remove from datastore
+        self.sliced[""] = sliced
+        if self.write_files:
+            utils.write_sliced(self.source_path, sliced)
+
+    def is_target(self, variable: int) -> bool:
+        # y is a target, or p.name when p is a target
+        return variable in self.target_variables or self.symbols.base[variable] in self.target_variables
+
+    def check_overwritten(self, desc: utils.Descriptor):
+        if desc.overwrites is not None:  # a literal is assigned eg. y = 2
+            for line in self.writers.pop(desc.overwrites, ()):
+                self.datastore.pop(line, None)  # value of the variable is overwritten, remove from datastore
+
+    def _store(self, line: int, val: utils.Record) -> None:
+        # every write to the datastore goes through _store / _set_write to keep self.writers in sync
+        if line in self.datastore:
+            self.writers[self.datastore[line].write].discard(line)
+        self.datastore[line] = val
+        self.writers.setdefault(val.write, set()).add(line)
+
+    def _set_write(self, line: int, variable: int) -> None:
+        self.writers[self.datastore[line].write].discard(line)
+        self.datastore[line].write = variable
+        self.writers.setdefault(variable, set()).add(line)
+
+
+def _skip() -> None:
+    pass
+
@@ -1,11 +1,7 @@
-from typing import List, Callable, Any, Tuple, Dict
+from typing import List, Callable, Any, Tuple, Dict, Set
 from dynapyt.analyses.BaseAnalysis import BaseAnalysis
-from dynapyt.instrument.IIDs import IIDs
-from dynapyt.utils.nodeLocator import get_node_by_location
 
-from dynamicslicing import utils
-import os
-import libcst.matchers as m
+from dynamicslicing import cache, utils
 
 
 
@@ -14,161 +10,152 @@ class SliceDataflow(BaseAnalysis):
     def __init__(self, source_path):
         super().__init__()
         self.source_path = source_path
-        with open(source_path, "r") as file:
-            source = file.read()
-        iid_object = IIDs(source_path)
 
-        self.lines_to_keep = []
-        self.target_variables = []
+        self.lines_to_keep = set()
+        self.target_variables = set()
         self.slicing_line = -1
-        self.class_def_lines = []
-        self.datastore = dict()  # to store line numbers, variable reads and writes
+        self.class_def_lines = set()
+        self.datastore = dict()  # to store line number -> utils.Record of its variable reads and writes
         self.aliases = dict()   # to store alias variables with line number
+        self.writers = dict()  # to store the lines currently writing each variable, reverse index of datastore
+        self.node_tables = dict()  # to store iid -> node lookup table of every instrumented file
+        self.source = None  # the original program when it is instrumented in memory (runner.run_source), else read from disk
+        self.locations = None  # iid map of the program instrumented in memory, else read from <program>-dynapyt.json
+        self.sliced = dict()  # to store criterion name ("" when unnamed) -> its sliced program
+        self.write_files = True  # write sliced.py next to the program, else the slices are only kept in self.sliced
+        self.symbols = utils.Symbols()  # to store the ids of the variables, the datastore only holds ids
 
 
     def begin_execution(self) -> None:
-        with open(os.path.splitext(self.source_path)[0] + '.py.orig', "r") as file:
-            source = file.read()
+        source = utils.original_source(self.source_path, self.source)
         if "DYNAPYT: DO NOT INSTRUMENT" not in source:  # only on un-Instrumented file
-            return_vals = utils.get_slice_line(source)
-            self.lines_to_keep = return_vals[0]
-            self.target_variables = return_vals[1]
+            return_vals = cache.static_analysis(source)[0]
+            self.lines_to_keep = set(return_vals[0])
+            self.target_variables = set(map(self.symbols.intern, return_vals[1]))
             self.slicing_line = return_vals[2]
-            self.class_def_lines = return_vals[3]
+            self.class_def_lines = set(return_vals[3])
         # print(self.lines_to_keep)
         # print(self.target_variables)
         # print(self.slicing_line)
         # print(self.class_def_lines)
 
+    def instrumented_lines(self, source: str) -> Set[int]:
+        """
+        Lines of the program to instrument, the hooks of any other line would be ignored
+        """
+        return_vals = cache.static_analysis(source)[0]
+        return utils.get_instrumented_lines(source, return_vals, range(1, source.count("\n") + 2))
+
+    def _node_entry(self, dyn_ast: str, iid: int) -> utils.NodeEntry:
+        table = self.node_tables.get(dyn_ast)
+        if table is None:  # resolve all iids of the file once, instead of searching the tree on each event
+            table = self.symbols.node_table(cache.node_table(dyn_ast, self.source, self.locations))
+            self.node_tables[dyn_ast] = table
+        return table[iid]
+
     def write(self, dyn_ast: str, iid: int, old_vals: List[Callable], new_val: Any) -> Any:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
         if location.start_line <= self.slicing_line and location.start_line not in self.class_def_lines:
             if location.start_line in self.datastore:
-                if m.matches(node, m.Assign()):
-                    if m.matches(node.targets[0].target, m.Attribute()):  # to handle obj access eg. p2.name
-                        self.datastore[location.start_line][
-                            "write"] = f"{node.targets[0].target.value.value}.{node.targets[0].target.attr.value}"
-                    else:
-                        if m.matches(node.targets[0].target,
-                                     m.Subscript()):  # to handle ages[2] = 23 ie subscript as target
-                            self.check_overwritten(node)  # check if value is overwritten
-                            self.datastore[location.start_line]["write"] = node.targets[0].target.value.value
-                        else:  # to handle y = 2
-                            self.check_overwritten(node)  # check if value is overwritten
-                            self.datastore[location.start_line]["write"] = node.targets[0].target.value
-                            if m.matches(node, m.Assign(value=m.Name())) and not m.matches(node, m.Assign(value=m.Call())):   # to handle obj aliases p2 = p1
-                                self.aliases[node.targets[0].target.value] = [node.value.value, location.start_line]
-
-
-                elif m.matches(node, m.AugAssign()):  # to handle y += 2
-                    self.datastore[location.start_line]["write"] = node.target.value
+                if location.kind == "Assign":
+                    if desc.target == "Attribute":  # to handle obj access eg. p2.name
+                        self._set_write(location.start_line, desc.write)
+                    else:  # to handle ages[2] = 23 ie subscript as target and y = 2
+                        self.check_overwritten(desc)  # check if value is overwritten
+                        if location.start_line in self.datastore:
+                            self._set_write(location.start_line, desc.write)
+                        else:  # the line overwrote its own earlier run eg. y = 2 in a loop
+                            self._store(location.start_line, utils.Record(write=desc.write))
+                        if desc.alias is not None:   # to handle obj aliases p2 = p1
+                            self.aliases[desc.write] = [desc.alias, location.start_line]
+
+
+                elif location.kind == "AugAssign":  # to handle y += 2
+                    self._set_write(location.start_line, desc.write)
             else:
-                if m.matches(node, m.Assign()):
-                    if m.matches(node.targets[0].target, m.Attribute()):  # to handle obj access eg. p2.name
-                        self.datastore[location.start_line] = {"read": [],
-                                                               "write": f"{node.targets[0].target.value.value}.{node.targets[0].target.attr.value}"}
-                    else:
-                        if m.matches(node.targets[0].target,
-                                     m.Subscript()):  # to handle ages[2] = 23 ie subscript as target
-                            self.check_overwritten(node)  # check if value is overwritten
-                            self.datastore[location.start_line] = {"read": [],
-                                                                   "write": node.targets[0].target.value.value}
-                        else:  # to handle y = 2
-                            self.check_overwritten(node)  # check if value is overwritten
-                            self.datastore[location.start_line] = {"read": [], "write": node.targets[0].target.value}
-
-                            # TODO: add obj alias code p2 = p1 ?
-
-                elif m.matches(node, m.AugAssign()):  # to handle y += 2
-                    self.datastore[location.start_line] = {"read": [], "write": node.target.value}
+                if location.kind == "Assign":
+                    if desc.target != "Attribute":  # to handle ages[2] = 23 ie subscript as target and y = 2
+                        self.check_overwritten(desc)  # check if value is overwritten
+                    self._store(location.start_line, utils.Record(write=desc.write))
+
+                    # TODO: add obj alias code p2 = p1 ?
+
+                elif location.kind == "AugAssign":  # to handle y += 2
+                    self._store(location.start_line, utils.Record(write=desc.write))
 
     def read(self, dyn_ast: str, iid: int, val: Any) -> Any:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
-        if location.start_line <= self.slicing_line and location.start_line not in self.class_def_lines and not m.matches(
-                node, m.Subscript()):
-            if location.start_line in self.datastore:
-                if m.matches(node, m.Attribute()):  # to handle object access eg: p.name
-                    self.datastore[location.start_line]["read"].append(f"{node.value.value}.{node.attr.value}")
-                else:
-                    self.datastore[location.start_line]["read"].append(node.value)
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
+        if location.start_line <= self.slicing_line and location.start_line not in self.class_def_lines and desc.reads:
+            if location.start_line in self.datastore:  # to handle variables and object access eg: p.name
+                self.datastore[location.start_line].add_reads(desc.reads)
             else:
-                if m.matches(node, m.Attribute()):  # To handle object access eg: p.name
-                    self.datastore[location.start_line] = {"read": [f"{node.value.value}.{node.attr.value}"],
-                                                           "write": ""}
-                else:
-                    self.datastore[location.start_line] = {"read": [node.value], "write": ""}
+                self._store(location.start_line, utils.Record(tuple(dict.fromkeys(desc.reads))))
 
     def post_call(self, dyn_ast: str, iid: int, result: Any, call: Callable, pos_args: Tuple, kw_args: Dict, ) -> Any:
-        location = self.iid_to_location(dyn_ast, iid)
-        node = get_node_by_location(self._get_ast(dyn_ast)[0], location)
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
         if location.start_line <= self.slicing_line and location.start_line not in self.class_def_lines:
             if location.start_line in self.datastore:
-                if m.matches(node.func, m.Attribute()):  # to handle normal function calls eg. a.append(), obj.funct()
-                    if not self.datastore[location.start_line]["write"]:    # put object into write
-                        self.datastore[location.start_line]["write"] = node.func.value.value
-                    for arg in node.args:  # to handle all positional arguments
-                        if m.matches(arg.value, m.Attribute()):  # to handle l.append(p.name)
-                            self.datastore[location.start_line]["read"].append(
-                                f"{arg.value.value.value}.{arg.value.attr.value}")
-
-                        elif m.matches(arg.value, m.Name()):  # to handle normal args (func(12), func(x))
-                            self.datastore[location.start_line]["read"].append(arg.value.value)
-
-
+                if desc.target == "Attribute":  # to handle normal function calls eg. a.append(), obj.funct()
+                    if not self.datastore[location.start_line].write:    # put object into write
+                        self._set_write(location.start_line, desc.write)
+                    # to handle all positional arguments eg. func(x), l.append(p.name)
+                    self.datastore[location.start_line].add_reads(desc.reads)
 
             else:
-                if m.matches(node.func, m.Attribute()):  # to handle normal function calls eg. a.append(), obj.funct()
-                    for arg in node.args:  # to handle all positional arguments
-                        if m.matches(arg.value, m.Attribute()):  # to handle l.append(p.name)
-                            self.datastore[location.start_line] = {
-                                "read": f"{arg.value.value.value}.{arg.value.attr.value}",
-                                "write": node.func.value.value}
-                        elif m.matches(arg.value, m.Name()):  # to handle normal args (func(12), func(x))
-                            self.datastore[location.start_line] = {"read": arg.value.value,
-                                                                   "write": node.func.value.value}
+                if desc.target == "Attribute":  # to handle normal function calls eg. a.append(), obj.funct()
+                    if desc.reads:  # the last positional argument eg. func(x), l.append(p.name)
+                        self._store(location.start_line, utils.Record(desc.reads[-1:], desc.write))
 
     def end_execution(self) -> None:
-        with open(os.path.splitext(self.source_path)[0] + '.py.orig', "r") as file:
-            source = file.read()
+        source = utils.original_source(self.source_path, self.source)
 
         self.datastore = dict(sorted(self.datastore.items(), reverse=True))
-        self.lines_to_keep = self.lines_to_keep + self.class_def_lines
+        self.lines_to_keep.update(self.class_def_lines)
+        self.target_variables = set(self.target_variables)
+        base = self.symbols.base
         # print(self.datastore)
         # print(self.target_variables)
 
         for line, val in self.datastore.items():
             # print(self.target_variables)
             # print(line, val)
-            if val["write"] in self.target_variables or (
-                    "." in val["write"] and val["write"][:val["write"].index(".")] in self.target_variables):
-                self.lines_to_keep.append(line)
-                if len(val["read"]) > 0 and len([x for x in val["read"] if x not in self.target_variables]) > 0:
-                    self.target_variables.extend(val["read"])
+            write = val.write
+            left = base[write]
+            if write in self.target_variables or (left != write and left in self.target_variables):
+                self.lines_to_keep.add(line)
+                self.target_variables.update(val.read)
 
             # DATA-FLOW : for aliases
-            if (not val.get("is_cond")
-                    and ("." in val["write"] and val["write"][:val["write"].index(".")] in list(self.aliases.keys()))
-                    or (val["write"] in list(self.aliases.keys()) and any(
-                        val["write"] + "." in r for r in val["read"]))):
-                left = val["write"][:val["write"].index(".")] if "." in val["write"] else val["write"]
-                right = self.aliases[left][0]
-                loc = self.aliases[left][1]
+            if (not val.is_cond
+                    and (left != write and left in self.aliases)
+                    or (write in self.aliases and any(base[r] == write != r for r in val.read))):
+                right, loc = self.aliases[left]
                 if right in self.target_variables:
-                    self.lines_to_keep.append(line)
-                    self.lines_to_keep.append(loc)
-                    self.target_variables.extend(val["read"])
+                    self.lines_to_keep.add(line)
+                    self.lines_to_keep.add(loc)
+                    self.target_variables.update(val.read)
 
         sliced = utils.remove_lines(source, self.lines_to_keep)
-        with open(os.path.dirname(self.source_path) + '/sliced.py', "w") as updated_file:
-            updated_file.write(sliced)
-
-    def check_overwritten(self, node):
-        if m.matches(node, m.Assign(
-                value=m.Integer() | m.Float() | m.Imaginary() | m.SimpleString() | m.FormattedString() | m.ConcatenatedString())):
-            for line, val in list(self.datastore.items()):
-                if node.targets[0].target.value == val["write"]:
-                    self.datastore.pop(line, None)  # value of the variable is overwritten, remove from datastore
-
-
+        self.sliced[""] = sliced
+        if self.write_files:
+            utils.write_sliced(self.source_path, sliced)
+
+    def check_overwritten(self, desc: utils.Descriptor):
+        if desc.overwrites is not None:  # a literal is assigned eg. y = 2
+            for line in self.writers.pop(desc.overwrites, ()):
+                self.datastore.pop(line, None)  # value of the variable is overwritten, remove from datastore
+
+    def _store(self, line: int, val: utils.Record) -> None:
+        # every write to the datastore goes through _store / _set_write to keep self.writers in sync
+        if line in self.datastore:
+            self.writers[self.datastore[line].write].discard(line)
+        self.datastore[line] = val
+        self.writers.setdefault(val.write, set()).add(line)
+
+    def _set_write(self, line: int, variable: int) -> None:
+        self.writers[self.datastore[line].write].discard(line)
+        self.datastore[line].write = variable
+        self.writers.setdefault(variable, set()).add(line)
@@ -0,0 +1,178 @@
+from typing import List, Callable, Any, Optional, Tuple, Dict, Iterable, Set
+
+from dynapyt.analyses.BaseAnalysis import BaseAnalysis
+
+from dynamicslicing import cache, utils
+from dynamicslicing.dependence_graph import DynamicDependenceGraph
+
+
+class SliceGraph(BaseAnalysis):
+    """
+    Data-flow + Control-flow slicing over a dynamic dependence graph, ie. every execution of a
+    statement (eg. in every loop iteration) is a separate node with its own dependences
+    """
+
+    def __init__(self, source_path):
+        super().__init__()
+        self.source_path = source_path
+
+        self.lines_to_keep = []
+        self.target_variables = []
+        self.slicing_line = -1
+        self.class_def_lines = set()
+        self.slice_me_lines = set()
+        self.control = utils.ControlDependence({}, {}, {}, {}, {})  # static control dependences of the module
+        self.loop_lines = set()  # to store the lines of executed for / while headers
+        self.graph = DynamicDependenceGraph()
+        self.criteria = dict()  # to store name -> [line, target_variables] of every slicing criterion
+        self.criterion_lines = dict()  # to store line -> names of the criteria on the line
+        self.seeds = dict()  # to store name -> nodes the backward traversal of a criterion starts from
+        self.current = None  # node of the statement instance being executed
+        self.open_criteria = ()  # to store the criteria of the current instance, which take their definitions at its end
+        self.node_tables = dict()  # to store iid -> node lookup table of every instrumented file
+        self.source = None  # the original program when it is instrumented in memory (runner.run_source), else read from disk
+        self.locations = None  # iid map of the program instrumented in memory, else read from <program>-dynapyt.json
+        self.sliced = dict()  # to store criterion name ("" when unnamed) -> its sliced program
+        self.write_files = True  # write sliced.py next to the program, else the slices are only kept in self.sliced
+
+    def begin_execution(self) -> None:
+        source = utils.original_source(self.source_path, self.source)
+        if "DYNAPYT: DO NOT INSTRUMENT" not in source:  # only on un-Instrumented file
+            return_vals, self.control = cache.static_analysis(source)
+            self.lines_to_keep = return_vals[0]
+            self.target_variables = return_vals[1]
+            self.slicing_line = return_vals[2]
+            self.class_def_lines = set(return_vals[3])
+            self.slice_me_lines = set(return_vals[4])
+            self.criteria = return_vals[5]
+            for name, (line, _) in self.criteria.items():
+                self.criterion_lines.setdefault(line, []).append(name)
+                self.seeds[name] = set()
+
+    def instrumented_lines(self, source: str) -> Set[int]:
+        """
+        Lines of the program to instrument, the hooks of any other line would be ignored
+        """
+        return_vals = cache.static_analysis(source)[0]
+        return utils.get_instrumented_lines(source, return_vals, return_vals[4])
+
+    def _node_table(self, dyn_ast: str) -> Dict[int, utils.NodeEntry]:
+        table = self.node_tables.get(dyn_ast)
+        if table is None:  # resolve all iids of the file once, instead of searching the tree on each event
+            table = cache.node_table(dyn_ast, self.source, self.locations)
+            self.node_tables[dyn_ast] = table
+        return table
+
+    def _node_entry(self, dyn_ast: str, iid: int) -> utils.NodeEntry:
+        return self._node_table(dyn_ast)[iid]
+
+    def _instance(self, location: utils.NodeEntry) -> Optional[int]:
+        """
+        Node of the statement instance an event belongs to, a new one is started when a different
+        statement (or the same header again) executes
+        """
+        line = location.statement_line
+        if line not in self.slice_me_lines or line in self.class_def_lines:  # intra-procedural only
+            return None
+        if self.current is None or self.graph.nodes[self.current]["line"] != line:
+            self._close_criterion()
+            self.current = self.graph.add_instance(line, self.control.controllers.get(line, ()))
+            for name in self.criterion_lines.get(line, ()):  # the slice starts from the criterion and its variables' definitions
+                self.seeds[name].add(self.current)
+            self.open_criteria = self.criterion_lines.get(line, ())
+        return self.current
+
+    def _close_criterion(self) -> None:
+        """
+        Add the definitions of the criterion's variables once its instance is over, so that
+        a criterion writing a variable (y = 2) starts from its own write, not from the one before
+        """
+        for name in self.open_criteria:
+            self.seeds[name].update(self.graph.last_def.get(utils.base_name(var)) for var in self.criteria[name][1])
+        self.open_criteria = ()
+
+    def write(self, dyn_ast: str, iid: int, old_vals: List[Callable], new_val: Any) -> Any:
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
+        node = self._instance(location)
+        if node is None or not desc.write:
+            return
+        if location.kind == "Assign":
+            if desc.target != "Name":  # to handle p2.name = x and ages[2] = 23
+                self.graph.modify(node, desc.write)
+            elif desc.alias is not None:  # to handle obj aliases p2 = p1
+                self.graph.alias(node, desc.write, desc.alias)
+            else:  # to handle y = 2
+                self.graph.define(node, desc.write)
+        elif location.kind == "AugAssign":  # to handle y += 2, ages[-1] += 50 and p.name += " World"
+            if desc.target != "Name":
+                self.graph.modify(node, desc.write)
+            else:
+                self.graph.use(node, desc.write)
+                self.graph.define(node, desc.write)
+
+    def read(self, dyn_ast: str, iid: int, val: Any) -> Any:
+        location = self._node_entry(dyn_ast, iid)
+        node = self._instance(location)
+        if node is not None:
+            for variable in location.desc.reads:  # subscripts are covered by the read of their object
+                self.graph.use(node, variable)
+
+    def post_call(self, dyn_ast: str, iid: int, result: Any, call: Callable, pos_args: Tuple, kw_args: Dict, ) -> Any:
+        location = self._node_entry(dyn_ast, iid)
+        desc = location.desc
+        node = self._instance(location)
+        if node is not None and desc.statement and desc.target == "Attribute":  # to handle a.append(x), obj.funct()
+            self.graph.modify(node, desc.write)
+
+    def enter_if(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        location = self._node_entry(dyn_ast, iid)
+        self._instance(location)
+        self.current = None  # the condition is evaluated, the body starts new instances
+
+    def enter_for(self, dyn_ast: str, iid: int, next_value: Any, iterable: Iterable) -> Optional[Any]:
+        location = self._node_entry(dyn_ast, iid)
+        node = self._instance(location)
+        if node is not None:
+            self.loop_lines.add(location.statement_line)
+            for variable in location.desc.reads:  # every iteration depends on the iterable
+                self.graph.use(node, variable)
+            for variable in location.desc.targets:
+                self.graph.define(node, variable)
+        self.current = None
+
+    def enter_while(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        location = self._node_entry(dyn_ast, iid)
+        if self._instance(location) is not None:
+            self.loop_lines.add(location.statement_line)
+        self.current = None
+
+    def end_execution(self) -> None:
+        self._close_criterion()
+        for name, lines in self.graph.slices(self.seeds, self.loop_lines).items():
+            self.write_slice(lines, name)
+
+    def write_slice(self, lines: Set[int], name: str = "") -> None:
+        """
+        Write sliced.py (sliced_<name>.py for a named criterion) keeping the given statement lines,
+        with the continue / break and else lines they need
+        """
+        source = utils.original_source(self.source_path, self.source)
+
+        for jumps in self.control.jumps.values():  # continue / break of a kept if or loop
+            for line in jumps["continue"] + jumps["break"]:
+                if any(header in lines for header in self.control.controllers.get(line, ())):
+                    lines.add(line)
+        for line in list(lines):
+            if line in self.control.else_lines:  # to keep the else of a kept statement
+                lines.add(self.control.else_lines[line])
+
+        lines_to_keep = self.lines_to_keep
+        if name:  # self.lines_to_keep has the line of the unnamed criterion instead
+            lines.add(self.criteria[name][0])
+            lines_to_keep = [line for line in lines_to_keep if line != self.slicing_line]
+        lines_to_keep = lines_to_keep + list(self.class_def_lines) + sorted(lines)
+        sliced = utils.remove_lines(source, lines_to_keep)
+        self.sliced[name] = sliced
+        if self.write_files:
+            utils.write_sliced(self.source_path, sliced, name)
@@ -0,0 +1,164 @@
+import json
+import mmap
+import os
+import struct
+from typing import List, Callable, Any, Optional, Tuple, Dict, Iterable, Iterator
+
+from dynapyt.instrument.IIDs import IIDs, Location
+
+from dynamicslicing import utils
+from dynamicslicing.slice import Slice
+from dynamicslicing.utils import WRITE, READ, POST_CALL, ENTER_IF, ENTER_FOR, ENTER_WHILE, CONTINUE, BREAK
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, without it the records are unpacked with struct
+    np = None
+
+# fixed-width event record: file id, iid, event kind, flag (condition value), instance counter of the (file, iid),
+# the variables of an event are those of its node, the offline slicer resolves them from the iid
+RECORD = struct.Struct("<HIBBQ")
+MAGIC = b"DSLT\x01\x00"
+FLUSH_SIZE = 1 << 20  # bytes buffered before writing to the trace file
+
+
+if np is not None:  # same layout as RECORD, a view over the mapped file
+    DTYPE = np.dtype([("file", "<u2"), ("iid", "<u4"), ("kind", "u1"), ("flag", "u1"), ("instance", "<u8")])
+
+
+def trace_paths(source_path: str) -> Tuple[str, str]:
+    """
+    Paths of the binary trace and of its name table (files) for a program
+    """
+    trace_path = os.path.splitext(source_path)[0] + ".trace"
+    return trace_path, trace_path + ".json"
+
+
+def read_trace(source_path: str) -> Tuple[Dict, Iterator[Tuple]]:
+    """
+    Name table of a recorded trace and an iterator over its (file, iid, kind, flag, instance) records
+    """
+    trace_path, table_path = trace_paths(source_path)
+    with open(table_path, "r") as file:
+        table = json.load(file)
+
+    def records():
+        with open(trace_path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{trace_path} is not a dynamicslicing trace")
+            while True:
+                chunk = file.read(RECORD.size * 4096)
+                if not chunk:
+                    break
+                yield from RECORD.iter_unpack(chunk)
+
+    return table, records()
+
+
+def chunks_backward(source_path: str, chunk_records: int = 1 << 20) -> Iterator:
+    """
+    Records of a trace from the last to the first, in chunks of chunk_records read through mmap,
+    so that only one chunk is in memory. A chunk is a NumPy structured array (a view, no copy) when numpy
+    is installed, else an iterator of (file, iid, kind, flag, instance) tuples. Records inside a chunk are in order.
+    """
+    trace_path, _ = trace_paths(source_path)
+    with open(trace_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size <= len(MAGIC):
+            return
+        # the map is released once the last chunk (a view into it) is dropped
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{trace_path} is not a dynamicslicing trace")
+    count = (len(mapped) - len(MAGIC)) // RECORD.size
+    records = np.frombuffer(mapped, dtype=DTYPE, count=count, offset=len(MAGIC)) if np is not None else None
+    for end in range(count, 0, -chunk_records):
+        start = max(0, end - chunk_records)
+        if records is not None:
+            yield records[start:end]
+        else:
+            yield RECORD.iter_unpack(mapped[len(MAGIC) + start * RECORD.size:len(MAGIC) + end * RECORD.size])
+
+
+class SliceRecord(Slice):
+    """
+    Record mode of Slice: the hooks only append fixed-width records to <program>.trace,
+    the slice is computed offline from the trace, see dynamicslicing.offline
+    """
+
+    def __init__(self, source_path):
+        super().__init__(source_path)
+        self.trace_path, self.table_path = trace_paths(source_path)
+        self.buffer = bytearray()
+        self.file = None
+        self.files = dict()  # to store dyn_ast -> file id
+        self.instances = dict()  # to store (file id, iid) -> number of executions
+
+    def begin_execution(self) -> None:
+        self.file = open(self.trace_path, "wb")
+        self.file.write(MAGIC)
+
+    def reslice(self) -> bool:
+        """
+        Never: the trace is only written by running the program
+        """
+        return False
+
+    def _record(self, dyn_ast: str, iid: int, kind: int, flag: bool = False) -> None:
+        file_id = self.files.get(dyn_ast)
+        if file_id is None:
+            file_id = self.files[dyn_ast] = len(self.files)
+        key = (file_id, iid)
+        instance = self.instances.get(key, 0)
+        self.instances[key] = instance + 1
+        self.buffer += RECORD.pack(file_id, iid, kind, flag, instance)
+        if len(self.buffer) >= FLUSH_SIZE:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def write(self, dyn_ast: str, iid: int, old_vals: List[Callable], new_val: Any) -> Any:
+        self._record(dyn_ast, iid, WRITE)
+
+    def read(self, dyn_ast: str, iid: int, val: Any) -> Any:
+        self._record(dyn_ast, iid, READ)
+
+    def post_call(self, dyn_ast: str, iid: int, result: Any, call: Callable, pos_args: Tuple, kw_args: Dict, ) -> Any:
+        self._record(dyn_ast, iid, POST_CALL)
+
+    def enter_if(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        self._record(dyn_ast, iid, ENTER_IF, bool(cond_value))
+
+    def enter_for(self, dyn_ast: str, iid: int, next_value: Any, iterable: Iterable) -> Optional[Any]:
+        self._record(dyn_ast, iid, ENTER_FOR)
+
+    def enter_while(self, dyn_ast: str, iid: int, cond_value: bool) -> Optional[bool]:
+        self._record(dyn_ast, iid, ENTER_WHILE, bool(cond_value))
+
+    def _continue(self, dyn_ast: str, iid: int) -> Optional[bool]:
+        self._record(dyn_ast, iid, CONTINUE)
+
+    def _break(self, dyn_ast: str, iid: int) -> Optional[bool]:
+        self._record(dyn_ast, iid, BREAK)
+
+    def end_execution(self) -> None:
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.close()
+        locations = self.locations if self.locations is not None else IIDs(self.source_path).iid_to_location
+        with open(self.table_path, "w") as file:
+            # the program and its iid map as well, runner.run_program restores the uninstrumented program after the run
+            json.dump({"source_path": self.source_path,
+                       "files": sorted(self.files, key=self.files.get),
+                       "source": utils.original_source(self.source_path, self.source),
+                       "iid_to_location": {iid: location._asdict() for iid, location in locations.items()}}, file)
+
+
+def recorded(analysis_class: Callable, source_path: str, table: Dict) -> Any:
+    """
+    An analysis_class instance for a trace, with the program and the iid map stored in its table
+    (as for a program instrumented in memory, see runner.run_source) when the trace has them
+    """
+    analysis = analysis_class(source_path)
+    if "source" in table:
+        analysis.source = table["source"]
+        analysis.locations = {int(iid): Location(**location) for iid, location in table["iid_to_location"].items()}
+    return analysis
@@ -1,8 +1,11 @@
-from typing import List, Union, Type, Optional
+import os
+import re
+from functools import lru_cache
+from typing import List, Union, Optional, Dict, NamedTuple, Tuple, Any, Iterable, Set
 import libcst as cst
 from libcst import CSTTransformer, Comment, CSTVisitor, FunctionDef, Call, ClassDef, CSTNode
 from libcst._flatten_sentinel import FlattenSentinel
-from libcst._nodes.statement import BaseStatement, If, SimpleStatementLine, Else, For, While
+from libcst._nodes.statement import BaseStatement, If, SimpleStatementLine, Else, For, While, BaseCompoundStatement
 from libcst._removal_sentinel import RemovalSentinel
 from libcst.metadata import (
     ParentNodeProvider,
@@ -10,6 +13,8 @@ from libcst.metadata import (
 )
 import libcst.matchers as m
 
+CRITERION = re.compile(r"# slicing criterion(?::\s*(\w+))?\s*")  # "# slicing criterion" or "# slicing criterion: name"
+
 
 class OddIfNegation(m.MatcherDecoratableTransformer):
     """
@@ -45,7 +50,9 @@ class MyVisitor(CSTVisitor):
             [],  # lines_to_keep
             [],  # target_variables
             -1,  # slicing criteria line number
-            []  # class definition lines
+            [],  # class definition lines
+            [],  # slice_me() lines
+            {}  # every slicing criterion, name -> [line number, target_variables], "" for # slicing criterion
         ]
 
     METADATA_DEPENDENCIES = (
@@ -54,48 +61,62 @@ class MyVisitor(CSTVisitor):
     )
 
     def leave_Comment(self, original_node: "Comment") -> None:
-        if original_node.value == "# slicing criterion":
-            # extract slicing criterion line number
-            self.return_vals[0].append(self.get_metadata(PositionProvider, original_node).start.line)
-            self.return_vals[2] = self.get_metadata(PositionProvider, original_node).start.line
+        criterion = CRITERION.fullmatch(original_node.value)
+        if criterion:
+            name = criterion.group(1) or ""
+            line = self.get_metadata(PositionProvider, original_node).start.line
 
             # extract target variable in the slicing criterion
             trailing_whitespace = self.get_metadata(ParentNodeProvider, original_node)
             next_parent = self.get_metadata(ParentNodeProvider, trailing_whitespace).body[0]
-
-            if m.matches(next_parent, m.Return()):
-                if m.matches(next_parent.value, m.Name()):  # to handle return x
-                    self.return_vals[1].append(next_parent.value.value)
-                elif m.matches(next_parent.value, m.Attribute()):  # to handle return p.name
-                    self.return_vals[1].append(next_parent.value.value.value)
-                    self.return_vals[1].append(f"{next_parent.value.value.value}.{next_parent.value.attr.value}")
-                elif m.matches(next_parent.value, m.BinaryOperation()):  # to handle return x + y + ...
-                    for var in m.findall(next_parent, m.Name()):
-                        self.return_vals[1].append(var.value)
-            elif m.matches(next_parent, m.Assign()):
-                if m.matches(next_parent, m.Assign(value=m.BinaryOperation())):  # to handle x + y + ...
-                    for var in m.findall(next_parent, m.Name()):
-                        self.return_vals[1].append(var.value)
-                elif m.matches(next_parent.targets[0], m.AssignTarget()):
-                    if m.matches(next_parent.value, m.Name()):  # to handle result = arr; both obj will be in target
-                        self.return_vals[1].append(next_parent.targets[0].target.value)
-                        self.return_vals[1].append(next_parent.value.value)
-                    elif m.matches(next_parent.targets[0].target, m.Subscript()):  # to handle a[2] = 100
-                        self.return_vals[1].append(next_parent.targets[0].target.value.value)
-                    else:  # to handle a = Hello()
-                        self.return_vals[1].append(next_parent.targets[0].target.value)
-            elif m.matches(next_parent, m.Expr(value=m.Call())):  # to handle function calls
-                if m.matches(next_parent.value, m.Call(func=m.Name())):  # to handle print(x)
-                    for arg in next_parent.value.args:
-                        self.return_vals[1].append(arg.value.value)
-                elif m.matches(next_parent.value, m.Call(func=m.Attribute())):  # to handle p1.funct()
-                    self.return_vals[1].append(next_parent.value.func.value.value)
-            # print(self.return_vals[1])
-            # TODO: Add more cases of slicing criterion
+            targets = self.criterion_targets(next_parent)
+            self.return_vals[5].setdefault(name, [line, []])
+            self.return_vals[5][name][0] = line
+            self.return_vals[5][name][1].extend(targets)
+
+            if not name:  # the (unnamed) slicing criterion of the analyses
+                # extract slicing criterion line number
+                self.return_vals[0].append(line)
+                self.return_vals[2] = line
+                self.return_vals[1].extend(targets)
+
+    def criterion_targets(self, next_parent: CSTNode) -> List[str]:
+        targets = []
+        if m.matches(next_parent, m.Return()):
+            if m.matches(next_parent.value, m.Name()):  # to handle return x
+                targets.append(next_parent.value.value)
+            elif m.matches(next_parent.value, m.Attribute()):  # to handle return p.name
+                targets.append(next_parent.value.value.value)
+                targets.append(f"{next_parent.value.value.value}.{next_parent.value.attr.value}")
+            elif m.matches(next_parent.value, m.BinaryOperation()):  # to handle return x + y + ...
+                for var in m.findall(next_parent, m.Name()):
+                    targets.append(var.value)
+        elif m.matches(next_parent, m.Assign()):
+            if m.matches(next_parent, m.Assign(value=m.BinaryOperation())):  # to handle x + y + ...
+                for var in m.findall(next_parent, m.Name()):
+                    targets.append(var.value)
+            elif m.matches(next_parent.targets[0], m.AssignTarget()):
+                if m.matches(next_parent.value, m.Name()):  # to handle result = arr; both obj will be in target
+                    targets.append(next_parent.targets[0].target.value)
+                    targets.append(next_parent.value.value)
+                elif m.matches(next_parent.targets[0].target, m.Subscript()):  # to handle a[2] = 100
+                    targets.append(next_parent.targets[0].target.value.value)
+                else:  # to handle a = Hello()
+                    targets.append(next_parent.targets[0].target.value)
+        elif m.matches(next_parent, m.Expr(value=m.Call())):  # to handle function calls
+            if m.matches(next_parent.value, m.Call(func=m.Name())):  # to handle print(x)
+                for arg in next_parent.value.args:
+                    targets.append(arg.value.value)
+            elif m.matches(next_parent.value, m.Call(func=m.Attribute())):  # to handle p1.funct()
+                targets.append(next_parent.value.func.value.value)
+        # TODO: Add more cases of slicing criterion
+        return targets
 
     def leave_FunctionDef(self, original_node: "FunctionDef") -> None:
         if original_node.name.value == "slice_me":
             self.return_vals[0].append(self.get_metadata(PositionProvider, original_node).start.line)
+            self.return_vals[4] = list(range(self.get_metadata(PositionProvider, original_node).start.line,
+                                             self.get_metadata(PositionProvider, original_node).end.line + 1))
         else:  # to handle any other function defs (We keep them as it is)
             self.return_vals[0].extend(range(self.get_metadata(PositionProvider, original_node).start.line,
                                              self.get_metadata(PositionProvider, original_node).end.line + 1))
@@ -178,61 +199,505 @@ class RemoveLinesTransformer(CSTTransformer):
         return updated_node
 
 
-class LocExtract(cst.CSTVisitor):
+LITERAL = m.Integer() | m.Float() | m.Imaginary() | m.SimpleString() | m.FormattedString() | m.ConcatenatedString()
+
+
+class Descriptor(NamedTuple):
+    """
+    Pre-classified shape of an instrumented node, compiled once before the hooks fire
+    """
+    target: str = ""  # kind of the assigned (or called) object: Name, Attribute or Subscript
+    write: Any = ""  # variable written by the node, eg. y, p2.name or the object of a method call
+    reads: Tuple = ()  # variables read by the node, eg. x, p.name or the arguments of a call
+    alias: Optional[str] = None  # right hand side of an object alias, p2 = p1
+    overwrites: Optional[str] = None  # variable whose earlier writes are overwritten by a literal, y = 2
+    print_literal: bool = False  # print("string")
+    body_count: int = 0  # number of SimpleStatementLines in the body of an if
+    test_reads: Tuple = ()  # variables (or attributes) used in the condition
+    counters: Tuple = ()  # (variable, line) of every aug assignment inside a while loop
+    targets: Tuple = ()  # variables assigned by a for loop in every iteration
+    statement: bool = False  # the call is a statement of its own eg. l.append(x)
+    jumps: Tuple = ()  # lines of the continue / break statements of a hooked block (or of the statement itself)
+
+
+# kinds of the hook events, shared by the run log of Slice, the trace records and the background batches;
+# a run log / batch event is packed in one int: file id << 37 | iid << 5 | flag (condition value) << 4 | kind
+WRITE, READ, POST_CALL, ENTER_IF, ENTER_FOR, ENTER_WHILE, CONTINUE, BREAK = range(1, 9)
+FLAG = 1 << 4
+
+# event kind -> name of the hook it is replayed with, and its arguments (the analyses only look at the iid and flag)
+HOOKS = {
+    WRITE: ("write", lambda dyn_ast, iid, flag: (dyn_ast, iid, [], None)),
+    READ: ("read", lambda dyn_ast, iid, flag: (dyn_ast, iid, None)),
+    POST_CALL: ("post_call", lambda dyn_ast, iid, flag: (dyn_ast, iid, None, None, (), {})),
+    ENTER_IF: ("enter_if", lambda dyn_ast, iid, flag: (dyn_ast, iid, bool(flag))),
+    ENTER_FOR: ("enter_for", lambda dyn_ast, iid, flag: (dyn_ast, iid, None, None)),
+    ENTER_WHILE: ("enter_while", lambda dyn_ast, iid, flag: (dyn_ast, iid, bool(flag))),
+    CONTINUE: ("_continue", lambda dyn_ast, iid, flag: (dyn_ast, iid)),
+    BREAK: ("_break", lambda dyn_ast, iid, flag: (dyn_ast, iid)),
+}
+
+
+class FileIds(dict):
+    """
+    dyn_ast -> file id, already shifted into place, a new file gets the next id on its first event
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.files = []  # to store the dyn_ast of every file id
+
+    def __missing__(self, dyn_ast: str) -> int:
+        self.files.append(dyn_ast)
+        file_id = self[dyn_ast] = (len(self.files) - 1) << 37
+        return file_id
+
+
+def decode(event: int, files: List[str]) -> Tuple[int, str, int, bool]:
+    """
+    Kind, dyn_ast, iid and flag of a packed event
+    """
+    return event & 0xF, files[event >> 37], (event >> 5) & 0xFFFFFFFF, bool(event & FLAG)
+
+
+NO_VARIABLE, JUMP = 0, 1  # ids of "" (the node writes nothing) and of _JMP_ (a break or continue)
+
+
+class Record:
+    """
+    Datastore entry of a line: the ids (see Symbols) of the variables it reads, each once, of the variable
+    it writes and, for an if or a loop, the lines of its body, as a range or as the tuple of control.body
+    shared by every entry of the loop
+    """
+    __slots__ = ("read", "write", "is_cond", "body")
+
+    def __init__(self, read: Tuple[int, ...] = (), write: int = NO_VARIABLE, is_cond: bool = False,
+                 body: Union[range, Tuple[int, ...]] = ()):
+        self.read = read
+        self.write = write
+        self.is_cond = is_cond
+        self.body = body
+
+    def add_reads(self, reads: Iterable[int]) -> None:
+        for variable in reads:  # a line read again in a loop reads the same variables, nothing is added
+            if variable not in self.read:
+                self.read += (variable,)
+
+    def __repr__(self) -> str:
+        return f"Record(read={self.read}, write={self.write}, is_cond={self.is_cond}, body={self.body})"
+
+
+class Symbols:
+    """
+    Symbol table of the variables and attribute paths (p2.name) of a run, interned to small ints
+    so the hooks and the slicing pass only compare ints. base[id] is the id of the object of an
+    attribute path (p for p.name), the id itself for a variable
+    """
+
+    def __init__(self):
+        self.ids = {"": NO_VARIABLE, "_JMP_": JUMP}  # to store name -> id
+        self.names = ["", "_JMP_"]  # to store id -> name
+        self.base = [NO_VARIABLE, JUMP]  # to store id -> id of its object
+        self.descriptors = dict()  # to store descriptor -> the same descriptor with interned variables
+
+    def intern(self, name: str) -> int:
+        symbol = self.ids.get(name)
+        if symbol is None:
+            base = self.intern(base_name(name)) if "." in name else len(self.names)
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.base.append(base)
+        return symbol
+
+    def descriptor(self, desc: Descriptor) -> Descriptor:
+        interned = self.descriptors.get(desc)
+        if interned is None:
+            intern = self.intern
+            interned = self.descriptors[desc] = desc._replace(
+                write=intern(desc.write) if isinstance(desc.write, str) else NO_VARIABLE,  # a.b.c() writes a node
+                reads=tuple(intern(variable) for variable in desc.reads),
+                alias=None if desc.alias is None else intern(desc.alias),
+                overwrites=None if desc.overwrites is None else intern(desc.overwrites),
+                test_reads=tuple(intern(variable) for variable in desc.test_reads),
+                counters=tuple((intern(variable), line) for variable, line in desc.counters),
+                targets=tuple(intern(variable) for variable in desc.targets))
+        return interned
+
+    def node_table(self, table: Dict[int, "NodeEntry"]) -> Dict[int, "NodeEntry"]:
+        """
+        build_node_table of a file with the variables of every descriptor interned, once per file
+        """
+        return {iid: entry._replace(desc=self.descriptor(entry.desc)) for iid, entry in table.items()}
+
+
+class NodeEntry(NamedTuple):
+    """
+    Pre-resolved node of an iid: its line span, its node kind, its descriptor
+    and the first and last line of the (innermost) statement it belongs to
+    """
+    start_line: int
+    end_line: int
+    kind: str
+    desc: Descriptor
+    statement_line: int
+    statement_end: int
+
+
+class PositionIndex(cst.CSTVisitor):
+    """
+    Collect all nodes of a module keyed by their exact position
+    """
     METADATA_DEPENDENCIES = (PositionProvider,)
 
-    def __init__(self, typ=Type[CSTNode]):
+    def __init__(self):
         super().__init__()
-        self.typ = typ
-        self.line = -1
+        self.nodes = dict()
+        self.statement_spans = dict()  # position -> first and last line of the enclosing statement
+        self.lines = dict()  # SimpleStatementLine (and continue / break) -> line number
+        self.expressions = set()  # values of expression statements eg. the call l.append(x)
+        self.statements = []  # first and last lines of the statements being visited
+
+    def on_visit(self, node: CSTNode) -> bool:
+        pos = self.get_metadata(PositionProvider, node)
+        if isinstance(node, (SimpleStatementLine, BaseCompoundStatement)):
+            self.statements.append((pos.start.line, pos.end.line))
+        # later (inner) nodes overwrite earlier ones, same as dynapyt's get_node_by_location
+        key = (pos.start.line, pos.start.column, pos.end.line, pos.end.column)
+        self.nodes[key] = node
+        self.statement_spans[key] = self.statements[-1] if self.statements else (pos.start.line, pos.end.line)
+        if isinstance(node, (SimpleStatementLine, cst.Continue, cst.Break)):
+            self.lines[node] = pos.start.line
+        elif isinstance(node, cst.Expr):
+            self.expressions.add(node.value)
+        return True
+
+    def on_leave(self, original_node: CSTNode) -> None:
+        if isinstance(original_node, (SimpleStatementLine, BaseCompoundStatement)):
+            self.statements.pop()
+
+
+class SourceModel:
+    """
+    A program parsed once, with its metadata wrapper and node positions, shared by all static passes of a run
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self.module = cst.parse_module(code)
+        # the module is not copied, the nodes the visitors see are the nodes of self.module
+        self.wrapper = cst.metadata.MetadataWrapper(self.module, unsafe_skip_copy=True)
+        self.positions = self.wrapper.resolve(PositionProvider)  # resolved metadata is kept by the wrapper
 
-    def visit_SimpleStatementLine(self, node: "SimpleStatementLine") -> Optional[bool]:
-        if str(node) == str(self.typ):
-            pos = self.get_metadata(PositionProvider, node)
-            self.line = pos.start.line
+
+@lru_cache(maxsize=8)
+def source_model(code: str) -> SourceModel:
+    """
+    Function to parse a program only once, however many passes (and analyses of the run) need it
+    """
+    return SourceModel(code)
 
 
 def negate_odd_ifs(code: str) -> str:
-    syntax_tree = cst.parse_module(code)
-    wrapper = cst.metadata.MetadataWrapper(syntax_tree)
     code_modifier = OddIfNegation()
-    new_syntax_tree = wrapper.visit(code_modifier)
+    new_syntax_tree = source_model(code).wrapper.visit(code_modifier)
     return new_syntax_tree.code
 
 
-def remove_lines(code: str, lines_to_keep: List[int]) -> str:
-    syntax_tree = cst.parse_module(code)
+def remove_lines(code: str, lines_to_keep: Iterable[int]) -> str:
+    model = source_model(code)
     print("Original Code: ")
-    print(syntax_tree.code)
+    print(model.module.code)
     print("")
-    wrapper = cst.metadata.MetadataWrapper(syntax_tree)
     code_modifier = RemoveLinesTransformer(lines_to_keep)
-    new_syntax_tree = wrapper.visit(code_modifier)
+    new_syntax_tree = model.wrapper.visit(code_modifier)
     print(f"Lines to Keep = {set(lines_to_keep)} | New Code: ")
     print(new_syntax_tree.code)
     print("-------------------------------------------------------------")
     return new_syntax_tree.code
 
 
+def original_source(source_path: str, source: Optional[str] = None) -> str:
+    """
+    The program before instrumentation: source when the program was instrumented in memory, else <program>.py.orig
+    """
+    if source is not None:
+        return source
+    with open(os.path.splitext(source_path)[0] + ".py.orig", "r") as file:
+        return file.read()
+
+
+def write_sliced(source_path: str, sliced: str, name: str = "") -> None:
+    """
+    Write the slice of a program next to it, to sliced.py or sliced_<name>.py for a named criterion
+    """
+    with open(os.path.join(os.path.dirname(source_path), f"sliced_{name}.py" if name else "sliced.py"), "w") as file:
+        file.write(sliced)
+
+
 def get_slice_line(code: str) -> List:
     """
         Function to extract line number of the slicing criterion,
         function def and function call of slice_me()
     """
-    syntax_tree = cst.parse_module(code)
-    # print(syntax_tree)
-    wrapper = cst.metadata.MetadataWrapper(syntax_tree)
     code_visitor = MyVisitor()
-    t = wrapper.visit(code_visitor)
+    t = source_model(code).wrapper.visit(code_visitor)
     return code_visitor.return_vals
 
 
-def get_location_from_node(code: str, node: CSTNode):
+def build_node_table(model: SourceModel, iid_to_location: Dict) -> Dict[int, NodeEntry]:
+    """
+        Function to resolve every iid of an instrumented file to its node in a single pass,
+        so that the analysis hooks do not need to search the tree on every event
+    """
+    index = PositionIndex()
+    _ = model.wrapper.visit(index)
+    table = dict()
+    descriptors = dict()  # several iids can point to the same node
+    for iid, location in iid_to_location.items():
+        key = (location.start_line, location.start_column, location.end_line, location.end_column)
+        node = index.nodes.get(key)
+        if node is not None:
+            if node not in descriptors:
+                descriptors[node] = describe(node, index)
+            table[iid] = NodeEntry(location.start_line, location.end_line, type(node).__name__, descriptors[node],
+                                   *index.statement_spans[key])
+    return table
+
+
+class ControlDependence(NamedTuple):
+    """
+    Static control dependences of a module, computed once from its control flow graph
+    """
+    controllers: Dict[int, Tuple[int, ...]]  # line -> if / loop header lines it is control dependent on
+    body: Dict[int, Tuple[int, ...]]  # if / loop header line -> lines of its body (true branch of an if)
+    orelse: Dict[int, Tuple[int, Tuple[int, ...]]]  # if / loop header line -> (else line, lines of the else branch)
+    else_lines: Dict[int, int]  # line -> line of the else branch it is directly nested in
+    jumps: Dict[int, Dict[str, Tuple[int, ...]]]  # loop header line -> lines of the continue / break statements of the loop
+
+
+def get_control_dependences(model: SourceModel) -> ControlDependence:
+    """
+        Function to build the statement level control flow graph of every function (and the module),
+        and derive the control dependences from its postdominator tree:
+        a statement is control dependent on a header if it postdominates one successor of the header
+        but not the header itself
+    """
+    positions = model.positions
+    scopes = []  # to store (statements in order, exit) of every function / class / module
+    successors = dict()  # to store the statements that can execute next of every statement
+    body, orelse, else_lines, jumps = dict(), dict(), dict(), dict()
+
+    def lines_of(block):
+        if not m.matches(block, m.IndentedBlock()):  # statements on the same line as the header
+            return ()
+        return tuple(line for statement in block.body
+                     for line in range(positions[statement].start.line, positions[statement].end.line + 1))
+
+    def build_block(block, follow, loop, scope, else_line=None):
+        if not m.matches(block, m.IndentedBlock()):
+            return build_statement(block, follow, loop, scope)
+        entry = follow
+        for statement in reversed(block.body):
+            entry = build_statement(statement, entry, loop, scope)
+            if else_line is not None:
+                else_lines[positions[statement].start.line] = else_line
+        return entry
+
+    def build_statement(statement, follow, loop, scope):
+        scope[0].append(statement)
+        line = positions[statement].start.line
+        if m.matches(statement, m.If()):
+            if m.matches(statement.orelse, m.Else()):
+                else_line = positions[statement.orelse].start.line
+                orelse[line] = (else_line, lines_of(statement.orelse.body))
+                otherwise = build_block(statement.orelse.body, follow, loop, scope, else_line)
+            elif m.matches(statement.orelse, m.If()):  # to handle elif
+                otherwise = build_statement(statement.orelse, follow, loop, scope)
+            else:
+                otherwise = follow
+            body[line] = lines_of(statement.body)
+            successors[statement] = [build_block(statement.body, follow, loop, scope), otherwise]
+        elif m.matches(statement, m.For() | m.While()):
+            otherwise = follow
+            if statement.orelse is not None:  # to handle for ... else
+                else_line = positions[statement.orelse].start.line
+                orelse[line] = (else_line, lines_of(statement.orelse.body))
+                otherwise = build_block(statement.orelse.body, follow, loop, scope, else_line)
+            jumps.setdefault(line, {"continue": (), "break": ()})
+            body[line] = lines_of(statement.body)
+            successors[statement] = [build_block(statement.body, statement, (statement, follow), scope), otherwise]
+        elif m.matches(statement, m.Try()):  # every statement of the try body can raise into the handlers
+            after = build_block(statement.finalbody.body, follow, loop, scope) if statement.finalbody else follow
+            handlers = [build_block(handler.body, after, loop, scope) for handler in statement.handlers]
+            if statement.orelse is not None:
+                after = build_block(statement.orelse.body, after, loop, scope)
+            successors[statement] = [build_block(statement.body, after, loop, scope)] + handlers
+        elif m.matches(statement, m.With()):
+            successors[statement] = [build_block(statement.body, follow, loop, scope)]
+        elif m.matches(statement, m.FunctionDef() | m.ClassDef()):  # a new scope, the definition itself runs in order
+            build_scope(statement.body)
+            successors[statement] = [follow]
+        else:  # simple statements (and the ones on the same line as their header)
+            small = statement.body if isinstance(statement.body, (list, tuple)) else ()
+            if any(m.matches(node, m.Return() | m.Raise()) for node in small):
+                successors[statement] = [scope[1]]
+            elif loop is not None and any(m.matches(node, m.Continue()) for node in small):
+                successors[statement] = [loop[0]]
+                jumps[positions[loop[0]].start.line]["continue"] += (line,)
+            elif loop is not None and any(m.matches(node, m.Break()) for node in small):
+                successors[statement] = [loop[1]]
+                jumps[positions[loop[0]].start.line]["break"] += (line,)
+            else:
+                successors[statement] = [follow]
+        return statement
+
+    def build_scope(block):
+        scope = ([], object())  # statements of the scope and its exit node
+        scopes.append(scope)
+        if m.matches(block, m.Module()):
+            entry = scope[1]
+            for statement in reversed(block.body):
+                entry = build_statement(statement, entry, None, scope)
+        else:
+            build_block(block, scope[1], None, scope)
+
+    build_scope(model.module)
+
+    controllers = dict()
+    for nodes, exit_node in scopes:
+        order = [exit_node] + nodes[::-1]  # roughly reverse flow order, converges in a few rounds
+        bit = {node: 1 << i for i, node in enumerate(order)}
+        postdominators = {node: (1 << len(order)) - 1 for node in order}
+        postdominators[exit_node] = bit[exit_node]
+        changed = True
+        while changed:
+            changed = False
+            for node in nodes:
+                value = (1 << len(order)) - 1
+                for successor in successors[node]:
+                    value &= postdominators[successor]
+                value |= bit[node]
+                if value != postdominators[node]:
+                    postdominators[node] = value
+                    changed = True
+
+        # the immediate postdominator of a node is the one postdominated by all its other strict postdominators
+        by_set = {value: node for node, value in postdominators.items()}
+        ipdom = {node: by_set.get(postdominators[node] & ~bit[node]) for node in nodes}
+        for header in nodes:
+            if len(successors[header]) < 2:
+                continue
+            header_line = positions[header].start.line
+            for successor in successors[header]:
+                if postdominators[header] & bit[successor]:  # executed on every path from the header
+                    continue
+                runner = successor
+                while runner is not exit_node and runner is not ipdom[header] and runner is not None:
+                    line = positions[runner].start.line
+                    if line != header_line:
+                        controllers.setdefault(line, set()).add(header_line)
+                    runner = ipdom[runner]
+
+    return ControlDependence({line: tuple(sorted(headers)) for line, headers in controllers.items()},
+                             body, orelse, else_lines, jumps)
+
+
+def get_instrumented_lines(code: str, return_vals: List, lines: Iterable[int]) -> Set[int]:
+    """
+        Function to restrict the lines an analysis gets hooks for: class bodies are left out, and so is everything
+        after the last slicing criterion, unless a loop around the criterion (or around a call of slice_me())
+        can still run it again after those lines
+    """
+    criteria = [line for line, targets in return_vals[5].values()]
+    if not criteria:
+        return set(lines) - set(return_vals[3])
+    positions = source_model(code).positions
+    calls = [position.start.line for node, position in positions.items()
+             if m.matches(node, m.Call(func=m.Name("slice_me")))]
+    last = max(criteria)
+    for node, position in positions.items():
+        if isinstance(node, (For, While)):
+            span = range(position.start.line, position.end.line + 1)
+            if any(line in span for line in calls):  # slice_me() runs again, with the rest of its body in between
+                return set(lines) - set(return_vals[3])
+            if any(line in span for line in criteria):  # the next iteration reaches the criterion again
+                last = max(last, position.end.line)
+    return {line for line in lines if line <= last} - set(return_vals[3])
+
+
+def base_name(variable: str) -> str:
+    """
+    Function to get the object of an attribute path, eg. p for p.name
+    """
+    return variable.split(".", 1)[0]
+
+
+def variable_key(node: CSTNode) -> str:
+    """
+    Function to get the variable name of a Name node, obj.attr of an Attribute node or obj of a Subscript node
+    """
+    if m.matches(node, m.Attribute()):
+        return f"{variable_key(node.value)}.{node.attr.value}"
+    elif m.matches(node, m.Subscript()):
+        return variable_key(node.value)
+    return node.value
+
+
+def describe(node: CSTNode, index: PositionIndex) -> Descriptor:
     """
-    Function to get line number of a given node(SimpleStatementLine) from the entire program
+    Function to compile the reads and writes of a node once, so the hooks only have to look them up
     """
-    syntax_tree = cst.parse_module(code)
-    ast_wrapper = cst.metadata.MetadataWrapper(syntax_tree)
-    extract = LocExtract(node)
-    _ = ast_wrapper.visit(extract)
-    return extract.line
+    try:
+        if m.matches(node, m.Assign()):
+            target = node.targets[0].target
+            if m.matches(target, m.Attribute()):  # p2.name = ...
+                return Descriptor(target="Attribute", write=variable_key(target))
+            elif m.matches(target, m.Subscript()):  # ages[2] = 23
+                return Descriptor(target="Subscript", write=variable_key(target.value))
+            else:  # y = 2
+                return Descriptor(target="Name", write=target.value,
+                                  alias=node.value.value if m.matches(node.value, m.Name()) else None,
+                                  overwrites=target.value if m.matches(node.value, LITERAL) else None)
+        elif m.matches(node, m.AugAssign()):
+            if m.matches(node.target, m.Subscript()):  # ages[-1] += 50
+                return Descriptor(target="Subscript", write=variable_key(node.target.value))
+            elif m.matches(node.target, m.Attribute()):  # p.name += " World"
+                return Descriptor(target="Attribute", write=variable_key(node.target))
+            return Descriptor(target="Name", write=node.target.value)
+        elif m.matches(node, m.Subscript()):
+            return Descriptor(target="Subscript")
+        elif m.matches(node, m.Name() | m.Attribute()):
+            return Descriptor(target=type(node).__name__, reads=(variable_key(node),))
+        elif m.matches(node, m.Call()):
+            reads = tuple(variable_key(arg.value) for arg in node.args if m.matches(arg.value, m.Name() | m.Attribute()))
+            if m.matches(node.func, m.Attribute()):  # a.append(x), obj.funct()
+                return Descriptor(target="Attribute", write=node.func.value.value, reads=reads,
+                                  statement=node in index.expressions)
+            return Descriptor(target="Name", reads=reads,
+                              print_literal=m.matches(node, m.Call(func=m.Name("print"),
+                                                                   args=[m.Arg(value=m.SimpleString()), m.ZeroOrMore()])))
+        elif m.matches(node, m.If()):
+            if m.matches(node.test, m.Comparison(left=m.Attribute())):  # the condition compares attributes eg. p.age > 5
+                test_reads = [variable_key(attr) for attr in m.findall(node.test, m.Attribute())]
+                test_reads.extend(variable_key(target.comparator) for target in
+                                  m.findall(node.test, m.ComparisonTarget(comparator=m.Attribute())))
+            else:
+                test_reads = [name.value for name in m.findall(node.test, m.Name())]
+            return Descriptor(body_count=len(m.findall(node.body, m.SimpleStatementLine())),
+                              test_reads=tuple(test_reads))
+        elif m.matches(node, m.While()):
+            counters = tuple((ss.body[0].target.value, index.lines[ss]) for ss in m.findall(node, m.SimpleStatementLine())
+                             if m.matches(ss.body[0], m.AugAssign(target=m.Name())))
+            return Descriptor(counters=counters)
+        elif m.matches(node, m.For()):
+            return Descriptor(reads=tuple(name.value for name in m.findall(node.iter, m.Name())),
+                              targets=tuple(name.value for name in m.findall(node.target, m.Name())))
+        elif m.matches(node, m.Continue() | m.Break()):
+            return Descriptor(jumps=(index.lines[node],))
+        elif m.matches(node, m.IndentedBlock()):  # the iid of a continue / break is the block holding it
+            return Descriptor(jumps=tuple(index.lines[statement] for statement in node.body
+                                          if m.matches(statement, m.SimpleStatementLine())
+                                          and any(m.matches(small, m.Continue() | m.Break()) for small in statement.body)))
+    except AttributeError:  # shapes the analysis does not handle, eg. a.b.c = 1
+        pass
+    return Descriptor()
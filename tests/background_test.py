@@ -0,0 +1,47 @@
+from functools import partial
+from glob import glob
+from os.path import basename, dirname, join, realpath
+from shutil import copyfile
+
+import pytest
+
+from dynamicslicing.background import SliceBackground
+from dynamicslicing.runner import run_program
+from dynamicslicing.slice import Slice
+from dynamicslicing.slice_graph import SliceGraph
+from run_single_test import correct_output
+
+TESTS = dirname(realpath(__file__))
+# the analysis the worker runs for the programs of each milestone
+ANALYSES = {"milestone3": Slice, "milestone4": SliceGraph}
+PROGRAMS = [(milestone, test) for milestone in ANALYSES
+            for test in sorted(basename(dirname(path)) for path in glob(join(TESTS, milestone, "test_*", "program.py")))]
+
+
+@pytest.mark.parametrize("milestone, test", PROGRAMS, ids=[f"{milestone}/{test}" for milestone, test in PROGRAMS])
+def test_background(milestone: str, test: str, tmp_path, capsys):
+    # small batches, so the worker slices while the program still runs
+    program_file = str(tmp_path / "program.py")
+    copyfile(join(TESTS, milestone, test, "program.py"), program_file)
+    run_program(program_file, partial(SliceBackground, analysis_class=ANALYSES[milestone], buffer_events=4))
+    for expected_file in sorted(glob(join(TESTS, milestone, test, "expected*.py"))):
+        with open(expected_file, "r") as file:
+            expected = file.read()
+        with open(tmp_path / basename(expected_file).replace("expected", "sliced", 1), "r") as file:
+            actual = file.read()
+        if not correct_output(expected, actual):
+            pytest.fail(f"Background slice of {milestone}/{test} does not match {basename(expected_file)}."
+                        f"\n--> Expected:\n{expected}\n--> Actual:\n{actual}")
+
+
+class FailingSlice(SliceGraph):
+    def end_execution(self) -> None:
+        raise ValueError("the worker fails")
+
+
+def test_worker_failure(tmp_path, capsys):
+    program_file = str(tmp_path / "program.py")
+    copyfile(join(TESTS, "milestone4", "test_1", "program.py"), program_file)
+    with pytest.raises(RuntimeError):
+        run_program(program_file, partial(SliceBackground, analysis_class=FailingSlice))
+    assert not (tmp_path / "sliced.py").exists()
@@ -0,0 +1,155 @@
+from os import listdir
+from os.path import dirname, join, realpath
+from shutil import copyfile
+
+import pytest
+from dynapyt.utils.hooks import get_hooks_from_analysis
+
+from dynamicslicing import cache, utils
+from dynamicslicing.runner import run_program
+from dynamicslicing.slice import Slice
+from dynamicslicing.slice_dataflow import SliceDataflow
+
+TESTS = dirname(realpath(__file__))
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """
+    A cache directory of the test's own, the tests run without a cache otherwise
+    """
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def program():
+    with open(join(TESTS, "milestone3", "test_1", "program.py"), "r") as file:
+        return file.read()
+
+
+def counted(monkeypatch, module, name: str):
+    """
+    Replace module.name by a wrapper counting its calls, the list of the calls is returned
+    """
+    calls = []
+    function = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return function(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, wrapper)
+    return calls
+
+
+def instrumented(directory, source: str, hooks, lines=None) -> str:
+    """
+    Instrument source as directory/program.py through the cache, the instrumented program is returned
+    """
+    directory.mkdir(exist_ok=True)
+    (directory / "program.py").write_text(source)
+    if (directory / "program-dynapyt.json").exists():  # the iids would continue from it
+        (directory / "program-dynapyt.json").unlink()
+    cache.instrument_file(str(directory / "program.py"), hooks, lines)
+    return (directory / "program.py").read_text()
+
+
+def test_instrument_file_hit(cache_dir, tmp_path, monkeypatch, capsys):
+    calls = counted(monkeypatch, cache, "_instrument")
+    program_file = str(tmp_path / "program.py")
+    copyfile(join(TESTS, "milestone3", "test_1", "program.py"), program_file)
+    run_program(program_file, Slice)
+    with open(tmp_path / "sliced.py", "r") as file:
+        first = file.read()
+    run_program(program_file, Slice)  # the instrumented program and its iid map are copied from the cache
+    with open(tmp_path / "sliced.py", "r") as file:
+        assert file.read() == first
+    assert len(calls) == 1
+    assert sorted(listdir(tmp_path)) == ["cache", "program.py", "sliced.py"]
+
+
+def test_instrument_file_invalidation(cache_dir, tmp_path, program, monkeypatch):
+    calls = counted(monkeypatch, cache, "_instrument")
+    (tmp_path / "program.py").write_text(program)  # SliceDataflow opens its program
+    hooks = get_hooks_from_analysis([Slice(str(tmp_path / "program.py"))])
+    first = instrumented(tmp_path / "a", program, hooks)
+    assert instrumented(tmp_path / "a", program, hooks) == first
+    assert len(calls) == 1
+    instrumented(tmp_path / "b", program, hooks)  # the instrumented code has the path
+    instrumented(tmp_path / "a", program.replace("x = 1", "x = 9"), hooks)  # another program
+    instrumented(tmp_path / "a", program, get_hooks_from_analysis([SliceDataflow(str(tmp_path / "program.py"))]))
+    instrumented(tmp_path / "a", program, hooks, [1, 2])  # other lines
+    assert len(calls) == 5
+    monkeypatch.setattr(cache, "_version", lambda: "a newer dynamicslicing")
+    assert instrumented(tmp_path / "a", program, hooks) == first
+    assert len(calls) == 6
+
+
+def test_instrument_source_hit(cache_dir, tmp_path, program, monkeypatch):
+    calls = counted(monkeypatch, cache.instrument, "instrument_source")
+    program_file = str(tmp_path / "program.py")
+    hooks = get_hooks_from_analysis([Slice(program_file)])
+    code, locations = cache.instrument_source(program_file, program, hooks)
+    assert cache.instrument_source(program_file, program, hooks) == (code, locations)
+    assert len(calls) == 1
+    cache.instrument_source(program_file, program, hooks, [1, 2])  # other lines
+    cache.instrument_source(str(tmp_path / "other.py"), program, hooks)  # the instrumented code has the path
+    assert len(calls) == 3
+    assert listdir(tmp_path) == ["cache"]  # nothing next to the program
+
+
+def test_static_analysis_hit(cache_dir, program, monkeypatch):
+    calls = counted(monkeypatch, utils, "get_slice_line")
+    assert cache.static_analysis(program) == cache.static_analysis(program)
+    assert len(calls) == 1
+    cache.static_analysis(program + "\n")
+    assert len(calls) == 2
+
+
+def test_corrupt_entry(cache_dir, program, monkeypatch):
+    calls = counted(monkeypatch, utils, "get_slice_line")
+    expected = cache.static_analysis(program)
+    for name in listdir(cache_dir / "static"):
+        with open(cache_dir / "static" / name, "rb") as file:
+            header = file.readline()
+        with open(cache_dir / "static" / name, "wb") as file:
+            file.write(header + b"not a pickle")
+    assert cache.static_analysis(program) == expected
+    assert len(calls) == 2
+
+
+def test_foreign_entry(cache_dir, program, monkeypatch):
+    # an entry not stored for this version and key is not unpickled at all
+    expected = cache.static_analysis(program)
+    calls = counted(monkeypatch, cache.pickle, "load")
+    for name in listdir(cache_dir / "static"):
+        with open(cache_dir / "static" / name, "rb") as file:
+            file.readline()
+            entry = file.read()
+        with open(cache_dir / "static" / name, "wb") as file:
+            file.write(b"dynamicslicing|another version\n" + entry)
+    assert cache.static_analysis(program) == expected
+    assert calls == []
+
+
+def test_version_covers_the_package(tmp_path, monkeypatch):
+    # a change of any module of dynamicslicing, not only of utils.py, gives other keys
+    package = dirname(cache.__file__)
+    for name in listdir(package):
+        if name.endswith(".py"):
+            copyfile(join(package, name), tmp_path / name)
+    monkeypatch.setattr(cache, "__file__", str(tmp_path / "cache.py"))
+    version = cache._version.__wrapped__()
+    assert version == cache._version()
+    with open(tmp_path / "slice.py", "a") as file:
+        file.write("# changed\n")
+    assert cache._version.__wrapped__() != version
+
+
+def test_no_cache(tmp_path, monkeypatch, program):
+    monkeypatch.setattr(cache, "CACHE_DIR", "")
+    calls = counted(monkeypatch, utils, "get_slice_line")
+    cache.static_analysis(program)
+    cache.static_analysis(program)
+    assert len(calls) == 2
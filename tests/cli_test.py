@@ -0,0 +1,72 @@
+import json
+from os.path import dirname, join, realpath
+from shutil import copyfile
+
+from dynamicslicing.cli import find_programs, main, slice_one
+
+TESTS = dirname(realpath(__file__))
+
+
+def copy_program(test: str, path) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    copyfile(join(TESTS, test, "program.py"), path)
+    return str(path)
+
+
+def test_find_programs(tmp_path):
+    first = copy_program("milestone3/test_1", tmp_path / "a" / "program.py")
+    second = copy_program("milestone4/test_7", tmp_path / "b" / "c" / "named.py")  # named criteria only
+    (tmp_path / "a" / "helper.py").write_text("x = 1\n")  # no slicing criterion
+    copyfile(first, tmp_path / "a" / "sliced.py")
+    copyfile(first, tmp_path / "a" / "expected.py")
+    other = copy_program("milestone3/test_2", tmp_path / "other.py")
+    assert find_programs([str(tmp_path / "a"), str(tmp_path / "b"), other]) == [first, second, other]
+
+
+def test_slice_one(tmp_path, capsys):
+    program = copy_program("milestone3/test_1", tmp_path / "program.py")
+    (tmp_path / "sliced_stale.py").write_text("")  # left by an earlier run, not an output of this one
+    result = slice_one(program, "slice")
+    assert result["status"] == "ok"
+    assert result["outputs"] == [str(tmp_path / "sliced.py")]
+    result = slice_one(program, "record")
+    assert result["outputs"] == [str(tmp_path / "program.trace")]
+
+
+def test_slice_one_error(tmp_path, capsys):
+    program = tmp_path / "program.py"
+    program.write_text("def slice_me():\n    x = 1 # slicing criterion\n    raise ValueError(x)\n\nslice_me()\n")
+    result = slice_one(str(program), "slice")
+    assert result["status"] == "error"
+    assert "ValueError" in result["error"]
+    assert result["outputs"] == []  # the analysis of a failed run does not slice
+
+
+def test_run(tmp_path, capsys):
+    first = copy_program("milestone3/test_1", tmp_path / "a" / "program.py")
+    second = copy_program("milestone4/test_7", tmp_path / "b" / "program.py")
+    assert main(["run", str(tmp_path), "--analysis", "graph", "--workers", "2", "--json", str(tmp_path / "results.json")]) == 0
+    with open(tmp_path / "results.json", "r") as file:
+        results = json.load(file)
+    assert [result["program"] for result in results] == [first, second]
+    assert results[1]["outputs"] == [str(tmp_path / "b" / name) for name in ("sliced.py", "sliced_count.py", "sliced_total.py")]
+    with open(join(TESTS, "milestone4", "test_7", "expected_count.py"), "r") as expected:
+        with open(tmp_path / "b" / "sliced_count.py", "r") as actual:
+            assert actual.read().strip() == expected.read().strip()
+
+
+def test_run_failure(tmp_path, capsys):
+    copy_program("milestone3/test_1", tmp_path / "a" / "program.py")
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "program.py").write_text("def slice_me():\n    x = 1 # slicing criterion\n    x.y\n\nslice_me()\n")
+    assert main(["run", str(tmp_path), "--workers", "1"]) == 1
+    assert "AttributeError" in capsys.readouterr().err
+
+
+def test_offline(tmp_path, capsys):
+    program = copy_program("milestone3/test_1", tmp_path / "program.py")
+    assert main(["run", program, "--analysis", "record", "--workers", "1"]) == 0
+    assert main(["offline", program, "--engine", "slice"]) == 0
+    with open(join(TESTS, "milestone3", "test_1", "expected.py"), "r") as expected:
+        with open(tmp_path / "sliced.py", "r") as actual:
+            assert actual.read().strip() == expected.read().strip()
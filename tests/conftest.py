@@ -12,6 +12,8 @@ def pytest_addoption(parser):
 
 
 def pytest_generate_tests(metafunc):
+    if "directory_pair" not in metafunc.fixturenames:  # the tests of the other modes pick their own programs
+        return
     # find all subdirectories that contain a micro-test
     directories = []
     selection = metafunc.config.getoption("only", default=None, skip=False)
@@ -22,6 +24,7 @@ def pytest_generate_tests(metafunc):
         start_dir = current_dir
     test_ids = []
     for root, dirs, files in walk(start_dir):
+        dirs.sort()  # the same tests in the same order in every pytest-xdist worker
         if all([f in files for f in ["program.py", "expected.py"]]):
             relative_path = root[len(current_dir) + len(sep) :]
             directories.append([root, relative_path])
@@ -0,0 +1,10 @@
+def scaled(value):
+    factor = 2
+    return value * factor
+
+def slice_me():
+    a = scaled(1)
+    b = scaled(a)
+    result = b # slicing criterion
+
+slice_me()
\ No newline at end of file
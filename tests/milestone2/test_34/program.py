@@ -0,0 +1,12 @@
+def scaled(value):
+    factor = 2
+    return value * factor
+
+def slice_me():
+    a = scaled(1)
+    b = scaled(a)
+    c = a + 1
+    result = b # slicing criterion
+    return result
+
+slice_me()
\ No newline at end of file
@@ -0,0 +1,17 @@
+class Counter:
+    def __init__(self, start):
+        self.count = start
+
+    def add(self, amount):
+        if amount > 0:
+            self.count += amount
+        else:
+            self.count -= 1
+
+
+def slice_me():
+    total = 5
+    total += 2
+    result = total * 2 # slicing criterion
+
+slice_me()
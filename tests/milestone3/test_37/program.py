@@ -0,0 +1,23 @@
+class Counter:
+    def __init__(self, start):
+        self.count = start
+
+    def add(self, amount):
+        if amount > 0:
+            self.count += amount
+        else:
+            self.count -= 1
+
+
+def slice_me():
+    c = Counter(0)
+    total = 5
+    c.add(3)
+    c.add(-2)
+    total += 2
+    result = total * 2 # slicing criterion
+    total = 0
+    c.add(10)
+    return result
+
+slice_me()
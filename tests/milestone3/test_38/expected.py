@@ -0,0 +1,11 @@
+def slice_me():
+    values = [1, -2, 3, -4, 5]
+    total = 0
+    for v in values:
+        if v < 0:
+            continue
+        else:
+            total += v
+    return total # slicing criterion
+
+slice_me()
\ No newline at end of file
@@ -0,0 +1,14 @@
+def slice_me():
+    rows = [[1, 2], [3, -1], [4, 5]]
+    total = 0
+    for row in rows:
+        for x in row:
+            if x < 0:
+                break
+            else:
+                total += x
+        if total > 100:
+            break
+    return total # slicing criterion
+
+slice_me()
\ No newline at end of file
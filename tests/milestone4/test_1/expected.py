@@ -0,0 +1,7 @@
+def slice_me():
+    count = 0
+    for i in range(5):
+        count += 1
+    return count # slicing criterion
+
+slice_me()
@@ -0,0 +1,10 @@
+def slice_me():
+    total = 0
+    count = 0
+    for i in range(5):
+        total += i
+        count += 1
+    total = 100
+    return count # slicing criterion
+
+slice_me()
@@ -0,0 +1,10 @@
+def slice_me():
+    x = 0
+    y = 5
+    for i in range(3):
+        x = i * 2
+        y = y + x
+    x = y
+    return x # slicing criterion
+
+slice_me()
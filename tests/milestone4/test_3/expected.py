@@ -0,0 +1,15 @@
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+def slice_me():
+    c = Counter()
+    d = c
+    n = 0
+    while n < 4:
+        if n % 2 == 0:
+            d.value += n
+        n += 1
+    return c.value # slicing criterion
+
+slice_me()
@@ -0,0 +1,11 @@
+def slice_me():
+    grid = [[0, 0], [0, 0]]
+    size = 2
+    total = 0
+    for r in range(size):
+        for c in range(size):
+            grid[r][c] = r + c
+            total += grid[r][c]
+    return total # slicing criterion
+
+slice_me()
@@ -0,0 +1,12 @@
+def slice_me():
+    grid = [[0, 0], [0, 0]]
+    size = 2
+    total = 0
+    for r in range(size):
+        for c in range(size):
+            grid[r][c] = r + c
+            total += grid[r][c]
+    grid[0][0] = 9
+    return total # slicing criterion
+
+slice_me()
@@ -0,0 +1,5 @@
+def slice_me():
+    x = 4
+    y = x * 2 # slicing criterion
+
+slice_me()
@@ -0,0 +1,8 @@
+def slice_me():
+    y = 1
+    z = y + 1
+    x = 4
+    y = x * 2 # slicing criterion
+    return z
+
+slice_me()
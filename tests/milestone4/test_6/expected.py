@@ -0,0 +1,9 @@
+def slice_me():
+    result = []
+    for i in range(6):
+        if i % 3 == 0:
+            continue
+        result.append(i)
+    return result # slicing criterion
+
+slice_me()
@@ -0,0 +1,11 @@
+def slice_me():
+    result = []
+    skipped = 0
+    for i in range(6):
+        if i % 3 == 0:
+            skipped += 1
+            continue
+        result.append(i)
+    return result # slicing criterion
+
+slice_me()
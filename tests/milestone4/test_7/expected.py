@@ -0,0 +1,11 @@
+def slice_me():
+    a = 1
+    b = 2
+    total = 0
+    count = 0
+    for i in range(4):
+        total += a * i
+        count += b
+    c = total + count # slicing criterion
+
+slice_me()
@@ -0,0 +1,8 @@
+def slice_me():
+    b = 2
+    count = 0
+    for i in range(4):
+        count += b
+    print(count) # slicing criterion: count
+
+slice_me()
@@ -0,0 +1,8 @@
+def slice_me():
+    a = 1
+    total = 0
+    for i in range(4):
+        total += a * i
+    print(total) # slicing criterion: total
+
+slice_me()
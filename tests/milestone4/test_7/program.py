@@ -0,0 +1,14 @@
+def slice_me():
+    a = 1
+    b = 2
+    total = 0
+    count = 0
+    for i in range(4):
+        total += a * i
+        count += b
+    c = total + count # slicing criterion
+    print(total) # slicing criterion: total
+    print(count) # slicing criterion: count
+    return c
+
+slice_me()
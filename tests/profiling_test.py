@@ -0,0 +1,53 @@
+import json
+from functools import partial
+from os.path import dirname, join, realpath
+from shutil import copyfile
+
+from dynamicslicing.profiling import HOOKS, Profile
+from dynamicslicing.runner import run_program, run_source
+from dynamicslicing.slice import Slice
+
+TESTS = dirname(realpath(__file__))
+
+
+def read(test: str) -> str:
+    with open(join(TESTS, test, "program.py"), "r") as file:
+        return file.read()
+
+
+def test_profile_report(capsys):
+    program_file = join(TESTS, "milestone3", "test_12", "program.py")
+    analysis = Slice(program_file, profile=True)
+    unprofiled = Slice(program_file, profile=False)
+    assert unprofiled.profile is None
+    sliced = run_source(read("milestone3/test_12"), [analysis, unprofiled], program_file)
+    assert sliced[""]
+
+    report = analysis.profile.report()
+    assert set(report["hooks"]) <= set(HOOKS)
+    assert report["events"] == sum(cost["calls"] for cost in report["hooks"].values()) > 0
+    assert report["hooks"]["write"]["calls"] > 0
+    assert report["helpers"]["node_table"]["calls"] == 1  # the first event of the file builds its node table
+    assert report["helpers"]["write_slice"]["calls"] == 1
+    assert report["end_execution_seconds"] > 0
+    assert report["datastore"]["entries"] == len(analysis.datastore)
+    json.dumps(report)
+
+
+def test_datastore_samples(capsys):
+    program_file = join(TESTS, "milestone3", "test_12", "program.py")
+    analysis = Slice(program_file)
+    profile = Profile(analysis, sample_events=2)
+    run_source(read("milestone3/test_12"), [analysis], program_file)
+    report = profile.report()
+    assert [events for events, _ in report["datastore"]["samples"]] == list(range(2, report["events"] + 1, 2))
+
+
+def test_profile_json(tmp_path, capsys):
+    program_file = str(tmp_path / "program.py")
+    copyfile(join(TESTS, "milestone3", "test_1", "program.py"), program_file)
+    run_program(program_file, partial(Slice, profile=True))
+    with open(tmp_path / "profile.json", "r") as file:
+        report = json.load(file)
+    assert report["program"] == program_file
+    assert report["events"] > 0
@@ -0,0 +1,87 @@
+from glob import glob
+from os.path import basename, dirname, join, realpath
+from shutil import copyfile
+
+import pytest
+
+from dynamicslicing import offline, trace
+from dynamicslicing.runner import run_program
+from dynamicslicing.trace import MAGIC, RECORD, SliceRecord, read_trace, trace_paths
+from run_single_test import correct_output
+
+TESTS = dirname(realpath(__file__))
+# the offline engine replaying the milestone programs of the analysis it stands for
+ENGINES = {"milestone2": "dataflow", "milestone3": "slice", "milestone4": "graph"}
+PROGRAMS = [(milestone, test) for milestone in ENGINES
+            for test in sorted(basename(dirname(path)) for path in glob(join(TESTS, milestone, "test_*", "program.py")))]
+
+
+def recorded_program(tmp_path, milestone: str, test: str) -> str:
+    """
+    Copy of a milestone program, run with SliceRecord through runner.run_program, which restores the
+    uninstrumented program: the offline slicer reads it and its iid map from the trace table
+    """
+    program_file = str(tmp_path / "program.py")
+    copyfile(join(TESTS, milestone, test, "program.py"), program_file)
+    run_program(program_file, SliceRecord)
+    return program_file
+
+
+def check_slices(tmp_path, milestone: str, test: str, pattern: str = "expected*.py") -> None:
+    for expected_file in sorted(glob(join(TESTS, milestone, test, pattern))):
+        with open(expected_file, "r") as file:
+            expected = file.read()
+        with open(tmp_path / basename(expected_file).replace("expected", "sliced", 1), "r") as file:
+            actual = file.read()
+        if not correct_output(expected, actual):
+            pytest.fail(f"Offline slice of {milestone}/{test} does not match {basename(expected_file)}."
+                        f"\n--> Expected:\n{expected}\n--> Actual:\n{actual}")
+
+
+@pytest.mark.parametrize("milestone, test", PROGRAMS, ids=[f"{milestone}/{test}" for milestone, test in PROGRAMS])
+def test_record_offline(milestone: str, test: str, tmp_path, capsys):
+    program_file = recorded_program(tmp_path, milestone, test)
+    assert not (tmp_path / "sliced.py").exists()  # recording does not slice
+    offline.replay(program_file, offline.ENGINES[ENGINES[milestone]])
+    check_slices(tmp_path, milestone, test)
+
+
+@pytest.mark.parametrize("test", [test for milestone, test in PROGRAMS if milestone == "milestone4"])
+def test_backward_offline(test: str, tmp_path, capsys):
+    program_file = recorded_program(tmp_path, "milestone4", test)
+    offline.slice_trace(program_file, "backward")
+    check_slices(tmp_path, "milestone4", test, "expected.py")
+
+
+def test_backward_chunks(tmp_path, monkeypatch, capsys):
+    # a chunk of one record walks the trace with every record split from its neighbours
+    program_file = recorded_program(tmp_path, "milestone4", "test_1")
+    lines = offline.backward_slice(program_file)
+    assert offline.backward_slice(program_file, chunk_records=1) == lines
+    monkeypatch.setattr(trace, "np", None)  # the records unpacked with struct, as without numpy
+    assert offline.backward_slice(program_file, chunk_records=3) == lines
+
+
+def test_instances(tmp_path, capsys):
+    # every execution of a node is counted apart, per file and iid
+    program_file = recorded_program(tmp_path, "milestone4", "test_1")
+    records = list(read_trace(program_file)[1])
+    executions = dict()
+    for file_id, iid, kind, flag, instance in records:
+        assert instance == executions.get((file_id, iid), 0)
+        executions[(file_id, iid)] = instance + 1
+    assert max(executions.values()) > 1  # the loop
+    assert RECORD.size * len(records) == (tmp_path / "program.trace").stat().st_size - len(MAGIC)
+
+
+def test_not_a_trace(tmp_path):
+    program_file = str(tmp_path / "program.py")
+    with pytest.raises(OSError):
+        offline.replay(program_file)
+    trace_path, table_path = trace_paths(program_file)
+    with open(table_path, "w") as file:
+        file.write('{"files": []}')
+    with open(trace_path, "wb") as file:
+        file.write(b"not a trace")
+    with pytest.raises(ValueError):
+        list(read_trace(program_file)[1])
@@ -0,0 +1,113 @@
+import re
+from glob import glob
+from os import listdir
+from os.path import basename, dirname, join, realpath
+from shutil import copyfile
+from typing import Optional
+
+import pytest
+
+from dynamicslicing import cache
+from dynamicslicing.runner import run_program
+from dynamicslicing.slice import Slice
+from dynamicslicing.trace import SliceRecord
+
+TESTS = dirname(realpath(__file__))
+PROGRAMS = sorted(basename(dirname(path)) for path in glob(join(TESTS, "milestone3", "test_*", "program.py")))
+CRITERION = re.compile(r"\s*# slicing criterion\s*$")
+
+
+@pytest.fixture
+def runs(tmp_path, monkeypatch):
+    """
+    A cache directory of the test's own, with the runs of Slice stored
+    """
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "RUNS", True)
+    return tmp_path
+
+
+def moved_up(source: str) -> Optional[str]:
+    """
+    The program with its slicing criterion moved to the closest assignment above it, None if there is none
+    """
+    lines = source.split("\n")
+    line = next(i for i, text in enumerate(lines) if CRITERION.search(text))
+    for i in range(line - 1, 0, -1):
+        if re.match(r"\s+\w+ = ", lines[i]) and "#" not in lines[i]:
+            lines[line] = CRITERION.sub("", lines[line])
+            lines[i] += " # slicing criterion"
+            return "\n".join(lines)
+    return None
+
+
+def sliced(directory, source: str, analysis_class=Slice) -> str:
+    """
+    sliced.py of source, written to program.py in directory and run with runner.run_program
+    """
+    with open(directory / "program.py", "w") as file:
+        file.write(source)
+    run_program(str(directory / "program.py"), analysis_class)
+    with open(directory / "sliced.py", "r") as file:
+        return file.read()
+
+
+def resliced(directory, source: str) -> Optional[str]:
+    """
+    sliced.py of source from the run stored for program.py in directory, None when Slice.reslice needs a new run
+    """
+    with open(directory / "program.py", "w") as file:
+        file.write(source)
+    (directory / "sliced.py").unlink(missing_ok=True)
+    if not Slice(str(directory / "program.py")).reslice():
+        return None
+    with open(directory / "sliced.py", "r") as file:
+        return file.read()
+
+
+@pytest.mark.parametrize("test", PROGRAMS)
+def test_reslice(test: str, runs, capsys):
+    with open(join(TESTS, "milestone3", test, "program.py"), "r") as file:
+        source = file.read()
+    (runs / "run").mkdir()
+    (runs / "new").mkdir()
+    assert resliced(runs / "run", source) is None  # nothing stored yet
+    full = sliced(runs / "run", source)
+    assert resliced(runs / "run", source) == full
+
+    source = moved_up(source)
+    if source is None:
+        return
+    assert resliced(runs / "run", source) == sliced(runs / "new", source)
+
+
+def test_reslice_fallback(runs, capsys):
+    (runs / "run").mkdir()
+    with open(join(TESTS, "milestone3", "test_37", "program.py"), "r") as file:
+        source = file.read()
+    sliced(runs / "run", source)
+    # the criterion further down needs hooks on lines the stored run did not instrument
+    down = CRITERION.sub("", source).replace("    return result", "    return result # slicing criterion")
+    assert resliced(runs / "run", down) is None
+    # another program, the same comments
+    assert resliced(runs / "run", source.replace("total = 5", "total = 6")) is None
+    # a run of run_program falls back to the full run
+    (runs / "new").mkdir()
+    assert sliced(runs / "run", down) == sliced(runs / "new", down)
+
+
+def test_no_runs_stored(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    with open(join(TESTS, "milestone3", "test_1", "program.py"), "r") as file:
+        source = file.read()
+    sliced(tmp_path, source)
+    assert resliced(tmp_path, source) is None
+    assert "runs" not in listdir(tmp_path / "cache")
+
+
+def test_modes_never_reslice(runs, capsys):
+    copyfile(join(TESTS, "milestone3", "test_1", "program.py"), runs / "program.py")
+    run_program(str(runs / "program.py"), Slice)
+    assert not SliceRecord(str(runs / "program.py")).reslice()
+    run_program(str(runs / "program.py"), SliceRecord)  # runs, to write the trace
+    assert (runs / "program.trace").exists()
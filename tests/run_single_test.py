@@ -1,15 +1,13 @@
-import sys
 from importlib import import_module
-from os import sep, remove
-from os.path import join, exists
-from shutil import copyfile, move
+from os import sep
+from os.path import join, basename
+from glob import glob
 from inspect import getmembers, isclass
 from typing import Tuple
 import libcst as cst
 import pytest
 
-from dynapyt.instrument.instrument import instrument_file
-from dynapyt.utils.hooks import get_hooks_from_analysis
+from dynamicslicing.runner import run_source
 from dynapyt.analyses.BaseAnalysis import BaseAnalysis
 
 
@@ -27,7 +25,6 @@ def correct_output(expected: str, actual: str) -> bool:
 
 def test_runner(directory_pair: Tuple[str, str], capsys):
     abs_dir, rel_dir = directory_pair
-    import dynapyt.runtime as _rt
 
     # gather hooks used by the analysis
     module_prefix = rel_dir.replace(sep, ".")
@@ -37,6 +34,8 @@ def test_runner(directory_pair: Tuple[str, str], capsys):
         module_name = "dynamicslicing.slice_dataflow"
     elif module_prefix.startswith("milestone3"):
         module_name = "dynamicslicing.slice"
+    elif module_prefix.startswith("milestone4"):
+        module_name = "dynamicslicing.slice_graph"
     else:
         pytest.fail(f"Could not determine module name for {rel_dir}")
     module = import_module(module_name)
@@ -44,34 +43,17 @@ def test_runner(directory_pair: Tuple[str, str], capsys):
         module, lambda c: isclass(c) and issubclass(c, BaseAnalysis) and c is not BaseAnalysis
     )
 
-    # instrument
+    # instrument and analyze in memory, nothing is written next to the program
     program_file = join(abs_dir, "program.py")
-    orig_program_file = join(abs_dir, "program.py.orig")
-    # make sure to instrument the uninstrumented version
     with open(program_file, "r") as file:
         src = file.read()
-        if "DYNAPYT: DO NOT INSTRUMENT" in src:
-            if not exists(orig_program_file):
-                pytest.fail(f"Could find only the instrumented program in {rel_dir}")
-            copyfile(orig_program_file, program_file)
+    if "DYNAPYT: DO NOT INSTRUMENT" in src:
+        pytest.fail(f"Found an instrumented program in {rel_dir}")
 
     analysis_instances = [class_[1](program_file) for class_ in analysis_classes]
-    selected_hooks = get_hooks_from_analysis(analysis_instances)
-    instrument_file(program_file, selected_hooks)
-
-
-    # analyze
-    _rt.analyses = None
-    _rt.set_analysis(analysis_instances)
     captured = capsys.readouterr()  # clear stdout
     # print(f"Before analysis: {captured.out}")  # for debugging purposes
-    for analysis_instance in analysis_instances:
-        if hasattr(analysis_instance, "begin_execution"):
-            analysis_instance.begin_execution()
-    import_module(f"{module_prefix}.program")
-    _rt.end_execution()
-    del sys.modules["dynapyt.runtime"]
-    del _rt
+    sliced = run_source(src, analysis_instances, program_file)
 
     # check output
     expected_file = join(abs_dir, "expected.py")
@@ -82,14 +64,18 @@ def test_runner(directory_pair: Tuple[str, str], capsys):
         capsys.readouterr()
     )  # read stdout produced by running the analyzed program
     # print(f"After analysis: {captured.out}")  # for debugging purposes
-    with open(join(abs_dir, "sliced.py"), "r") as file:
-        actual = file.read()
+    actual = sliced[""]
     if not correct_output(expected, actual):
         pytest.fail(
             f"Output of {rel_dir} does not match expected output.\n--> Expected:\n{expected}\n--> Actual:\n{actual}"
         )
 
-    # restore uninstrumented program and remove temporary files
-    move(orig_program_file, program_file)
-    remove(join(abs_dir, "program-dynapyt.json"))
-    remove(join(abs_dir, "sliced.py"))
+    # named criteria, # slicing criterion: name is sliced into sliced["name"]
+    for expected_file in glob(join(abs_dir, "expected_*.py")):
+        with open(expected_file, "r") as file:
+            expected = file.read()
+        actual = sliced[basename(expected_file)[len("expected_"):-len(".py")]]
+        if not correct_output(expected, actual):
+            pytest.fail(
+                f"Output of {rel_dir} does not match {basename(expected_file)}.\n--> Expected:\n{expected}\n--> Actual:\n{actual}"
+            )
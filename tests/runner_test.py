@@ -0,0 +1,49 @@
+import atexit
+import signal
+import sys
+
+import pytest
+
+from dynamicslicing.runner import run_source, runtime
+from dynamicslicing.slice import Slice
+
+PROGRAM = """def slice_me():
+    x = 1
+    y = x + 1 # slicing criterion
+    return y
+
+slice_me()
+"""
+
+
+class Ended(Slice):
+    def end_execution(self) -> None:
+        self.ended = True
+        super().end_execution()
+
+
+def test_runtime_is_scoped(monkeypatch):
+    # the exit of the interpreter and SIGINT / SIGTERM do not call the end_execution of a finished run
+    registered = []
+    monkeypatch.setattr(atexit, "register", lambda function: registered.append(function))
+    monkeypatch.setattr(atexit, "unregister", lambda function: registered.remove(function))
+    handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+    previous = sys.modules.get("dynapyt.runtime")
+    with runtime([]) as _rt:
+        assert registered == [_rt.end_execution]
+        assert signal.getsignal(signal.SIGINT) == _rt.end_execution
+    assert registered == []
+    assert (signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)) == handlers
+    assert sys.modules.get("dynapyt.runtime") is previous
+
+
+def test_no_slice_of_a_failed_run(capsys):
+    analysis = Ended("program.py")
+    analysis.ended = False
+    with pytest.raises(ZeroDivisionError):
+        run_source(PROGRAM.replace("return y", "return y / 0"), [analysis])
+    assert not analysis.ended
+    assert analysis.sliced == {}
+    analysis = Ended("program.py")
+    run_source(PROGRAM, [analysis])
+    assert analysis.ended and analysis.sliced